@@ -26,22 +26,28 @@ Fecha: Noviembre 2025
 """
 
 import os
+import re
 import sys
-import csv
+import argparse
+import time
 from pathlib import Path
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
 import pyomo.environ as pyo
-from pyomo.opt import SolverFactory
+from pyomo.contrib.appsi.base import TerminationCondition
 
 # Importar módulos
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
-from datos_caso2 import cargar_datos_caso2
-from modelo_caso2 import build_model_caso2
+from datos_caso2 import cargar_datos_caso2_cache
+from modelo_caso2 import build_model_caso2, ajustar_cotas_combustible
+from pipeline_caso2 import (resolver, extraer_solucion_completa,
+                            exportar_verificacion, visualizar_rutas, reportar_tiempos)
+from subset import build_subset
 
 # Rutas
 PROJECT_ROOT = Path(__file__).parent
 RESULTS_DIR = PROJECT_ROOT / 'results' / 'caso2'
+WARM_START_PATH = RESULTS_DIR / 'warm_start.json'
+TIMING_PATH = RESULTS_DIR / 'timing.json'
+HIGHS_LOG_PATH = RESULTS_DIR / 'highs.log'
 DATA_CASO2 = PROJECT_ROOT.parent / 'project_c' / 'Proyecto_C_Caso2'
 DATA_BASE = PROJECT_ROOT.parent / 'Proyecto_Caso_Base'
 
@@ -50,6 +56,9 @@ DATA_BASE = PROJECT_ROOT.parent / 'Proyecto_Caso_Base'
 N_CLIENTES_ESCENARIO = None  # Se determinará automáticamente leyendo test_escalabilidad_resultados.txt
 TIME_LIMIT = 300  # 5 minutos para obtener mejor solución
 GAP_TOLERANCE = 0.15  # 15% de gap aceptable
+DEBUG_SOLVER = os.environ.get('DEBUG_SOLVER', '0') == '1'  # Log de HiGHS en consola
+# Resolución del PNG (100 para corridas de rutina, PNG_DPI=300 para la entrega)
+PNG_DPI = int(os.environ.get('PNG_DPI', '100'))
 
 # Clientes ordenados por distancia (más lejanos primero)
 CLIENTES_LEJANOS = [
@@ -70,6 +79,13 @@ CLIENTES_LEJANOS = [
 ]
 
 
+# Bloque "Escenario: N clientes ... Status: <estado>" del test de escalabilidad.
+# El lookahead evita que un escenario sin Status tome el Status del siguiente.
+_PATRON_ESCENARIO = re.compile(
+    r'Escenario:\s*(\d+)\s*clientes(?:(?!Escenario:)[\s\S])*?Status:\s*(\w+)'
+)
+
+
 def determinar_escenario_factible():
     """
     Lee los resultados del test de escalabilidad y determina
@@ -86,309 +102,21 @@ def determinar_escenario_factible():
     with open(resultado_file, 'r', encoding='utf-8') as f:
         contenido = f.read()
     
-    # Buscar el máximo número de clientes con status factible
-    max_factible = 2  # Por defecto al menos 2 clientes
-    
-    for linea in contenido.split('\n'):
-        if 'Escenario:' in linea and 'clientes' in linea:
-            try:
-                n = int(linea.split(':')[1].strip().split()[0])
-            except:
-                continue
-        elif 'Status:' in linea:
-            if 'optimal' in linea.lower() or 'feasible' in linea.lower():
-                max_factible = max(max_factible, n)
+    # Buscar el máximo número de clientes con status factible (una sola pasada)
+    factibles = [int(m.group(1)) for m in _PATRON_ESCENARIO.finditer(contenido)
+                 if m.group(2).lower() in ('optimal', 'feasible')]
+    max_factible = max(factibles + [2])  # Por defecto al menos 2 clientes
     
     print(f"✓ Escenario factible más grande identificado: {max_factible} clientes")
     return max_factible
 
 
-def extraer_solucion_completa(model, data2):
-    """Extrae la solución del modelo con datos completos de combustible"""
-    
-    vehiculos = data2['VEHICLES']
-    DEPOT = data2['DEPOT']
-    CLIENTS = data2['CLIENTS']
-    STATIONS = data2['STATIONS']
-    dist = data2['dist']
-    demanda = data2['demanda']
-    fuel_cap = data2['fuel_cap']
-    fuel_efficiency = data2['fuel_efficiency']
-    fuel_price = data2['fuel_price']
-    
-    solucion = {
-        'rutas': {},
-        'vehiculos_usados': [],
-        'distancias': {},
-        'cargas': {},
-        'combustible': {},  # Niveles de combustible por nodo
-        'recargas': {},  # Recargas por estación
-        'costo_total': 0,
-        'costo_fijo': 0,
-        'costo_distancia': 0,
-        'costo_combustible': 0,
-        'distancia_total': 0,
-        'num_vehiculos': 0,
-        'clientes_visitados': 0
-    }
-    
-    for vid in vehiculos:
-        # Verificar si el vehículo fue usado
-        if pyo.value(model.y[vid]) < 0.5:
-            continue
-        
-        solucion['vehiculos_usados'].append(vid)
-        solucion['num_vehiculos'] += 1
-        
-        # Reconstruir ruta
-        ruta = [DEPOT]
-        visitados = {DEPOT}
-        actual = DEPOT
-        
-        while True:
-            # Buscar próximo nodo
-            siguiente = None
-            for i, j in model.A:
-                if i == actual and pyo.value(model.x[vid, i, j]) > 0.5:
-                    siguiente = j
-                    break
-            
-            if siguiente is None or siguiente == DEPOT:
-                ruta.append(DEPOT)
-                break
-            
-            if siguiente in visitados and siguiente != DEPOT:
-                print(f"⚠️  Ciclo detectado en ruta de {vid}")
-                break
-            
-            ruta.append(siguiente)
-            visitados.add(siguiente)
-            actual = siguiente
-        
-        solucion['rutas'][vid] = ruta
-        
-        # Calcular distancia de la ruta
-        dist_ruta = 0
-        for i in range(len(ruta) - 1):
-            dist_ruta += dist[(ruta[i], ruta[i+1])]
-        solucion['distancias'][vid] = dist_ruta
-        solucion['distancia_total'] += dist_ruta
-        
-        # Calcular carga total entregada
-        carga_total = sum(demanda.get(nodo, 0) for nodo in ruta if nodo in CLIENTS)
-        solucion['cargas'][vid] = carga_total
-        solucion['clientes_visitados'] += sum(1 for nodo in ruta if nodo in CLIENTS)
-        
-        # Extraer datos de combustible
-        combustible_nodos = {}
-        recargas_nodos = {}
-        
-        for nodo in ruta:
-            fuel_level = pyo.value(model.combustible[vid, nodo])
-            combustible_nodos[nodo] = fuel_level
-            
-            refuel_amount = pyo.value(model.recarga[vid, nodo])
-            if refuel_amount > 0.1:  # Threshold para evitar ruido numérico
-                recargas_nodos[nodo] = refuel_amount
-        
-        solucion['combustible'][vid] = combustible_nodos
-        solucion['recargas'][vid] = recargas_nodos
-    
-    # Calcular costos
-    solucion['costo_fijo'] = solucion['num_vehiculos'] * data2['C_fixed']
-    solucion['costo_distancia'] = solucion['distancia_total'] * data2['C_km']
-    
-    # Costo de combustible (sumando todas las recargas)
-    costo_fuel = 0
-    for vid in solucion['vehiculos_usados']:
-        for nodo, cantidad in solucion['recargas'][vid].items():
-            precio = fuel_price.get(nodo, data2['fuel_price_depot'])
-            costo_fuel += cantidad * precio
-    
-    solucion['costo_combustible'] = costo_fuel
-    solucion['costo_total'] = solucion['costo_fijo'] + solucion['costo_distancia'] + solucion['costo_combustible']
-    
-    return solucion
-
-
-def exportar_verificacion(solucion, data2, output_path):
-    """
-    Exporta CSV con columnas extendidas incluyendo información de combustible y estaciones
-    """
-    print(f"\nExportando verificación a: {output_path}")
-    
-    with open(output_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        
-        # Header extendido
-        writer.writerow([
-            'VehicleId',
-            'DepotId', 
-            'InitialLoad',
-            'InitialFuel',
-            'RouteSequence',
-            'ClientsServed',
-            'DemandsSatisfied',
-            'StationsVisited',
-            'RefuelAmounts',
-            'TotalDistance',
-            'TotalTime',
-            'FuelCost',
-            'TotalCost'
-        ])
-        
-        for vid in solucion['vehiculos_usados']:
-            ruta = solucion['rutas'][vid]
-            
-            # Clientes servidos
-            clientes = [nodo for nodo in ruta if nodo in data2['CLIENTS']]
-            demandas = [data2['demanda'][c] for c in clientes]
-            
-            # Estaciones visitadas
-            estaciones = [nodo for nodo in ruta if nodo in data2['STATIONS']]
-            
-            # Recargas
-            recargas_info = []
-            fuel_cost_veh = 0
-            for est, cantidad in solucion['recargas'][vid].items():
-                precio = data2['fuel_price'].get(est, data2['fuel_price_depot'])
-                recargas_info.append(f"{est}:{cantidad:.1f}gal")
-                fuel_cost_veh += cantidad * precio
-            
-            # Tiempo estimado
-            tiempo_h = solucion['distancias'][vid] / 60  # Asumiendo 60 km/h promedio
-            
-            # Costo individual del vehículo
-            costo_veh = (data2['C_fixed'] + 
-                        solucion['distancias'][vid] * data2['C_km'] +
-                        fuel_cost_veh)
-            
-            writer.writerow([
-                vid,
-                data2['DEPOT'],
-                0,  # InitialLoad (sale vacío)
-                data2['fuel_cap'][vid],  # InitialFuel (tanque lleno)
-                ' -> '.join(ruta),
-                ', '.join(clientes),
-                ', '.join(f"{d:.1f}kg" for d in demandas),
-                ', '.join(estaciones) if estaciones else 'NINGUNA',
-                '; '.join(recargas_info) if recargas_info else 'NINGUNA',
-                f"{solucion['distancias'][vid]:.2f}",
-                f"{tiempo_h:.2f}",
-                f"{fuel_cost_veh:.2f}",
-                f"{costo_veh:.2f}"
-            ])
-    
-    print(f"✓ Verificación exportada: {len(solucion['vehiculos_usados'])} vehículos")
-
-
-def visualizar_rutas(solucion, data2, output_path):
-    """
-    Genera visualización de rutas destacando las estaciones donde se recarga
-    """
-    print(f"\nGenerando visualización de rutas...")
-    
-    fig, ax = plt.subplots(figsize=(14, 10))
-    
-    # Obtener coordenadas desde data2
-    coords = {}
-    
-    # Cargar coordenadas originales
-    depots_df = pd.read_csv(DATA_BASE / 'depots.csv')
-    clients_df = pd.read_csv(DATA_BASE / 'clients.csv')
-    stations_df = pd.read_csv(DATA_CASO2 / 'stations.csv')
-    
-    # Depot
-    depot_row = depots_df[depots_df['DepotId'] == data2['DEPOT']].iloc[0]
-    coords[data2['DEPOT']] = (depot_row['Latitude'], depot_row['Longitude'])
-    
-    # Clientes
-    for _, row in clients_df.iterrows():
-        coords[row['ClientId']] = (row['Latitude'], row['Longitude'])
-    
-    # Estaciones
-    for _, row in stations_df.iterrows():
-        coords[row['StationId']] = (row['Latitude'], row['Longitude'])
-    
-    # Identificar estaciones con recarga
-    estaciones_con_recarga = set()
-    for vid in solucion['vehiculos_usados']:
-        estaciones_con_recarga.update(solucion['recargas'][vid].keys())
-    
-    # Colores para vehículos
-    colores = ['blue', 'green', 'orange', 'purple', 'brown']
-    
-    # Dibujar rutas
-    for idx, vid in enumerate(solucion['vehiculos_usados']):
-        ruta = solucion['rutas'][vid]
-        color = colores[idx % len(colores)]
-        
-        for i in range(len(ruta) - 1):
-            nodo_i = ruta[i]
-            nodo_j = ruta[i+1]
-            
-            if nodo_i in coords and nodo_j in coords:
-                lat_i, lon_i = coords[nodo_i]
-                lat_j, lon_j = coords[nodo_j]
-                
-                # Estilo de línea: sólida para rutas, punteada si pasa por estación
-                if nodo_i in data2['STATIONS'] or nodo_j in data2['STATIONS']:
-                    ax.plot([lon_i, lon_j], [lat_i, lat_j], 
-                           color=color, linewidth=1.5, linestyle='--', alpha=0.7,
-                           label=f'{vid}' if i == 0 else '')
-                else:
-                    ax.plot([lon_i, lon_j], [lat_i, lat_j], 
-                           color=color, linewidth=2, alpha=0.8,
-                           label=f'{vid}' if i == 0 else '')
-    
-    # Dibujar nodos
-    # Depot
-    depot_coords = coords[data2['DEPOT']]
-    ax.scatter(depot_coords[1], depot_coords[0], c='red', s=300, marker='s', 
-              edgecolors='black', linewidth=2, zorder=5, label='Depósito')
-    
-    # Clientes
-    clientes_visitados = set()
-    for vid in solucion['vehiculos_usados']:
-        clientes_visitados.update(c for c in solucion['rutas'][vid] if c in data2['CLIENTS'])
-    
-    for cliente in clientes_visitados:
-        if cliente in coords:
-            lat, lon = coords[cliente]
-            ax.scatter(lon, lat, c='lightblue', s=150, marker='o',
-                      edgecolors='darkblue', linewidth=1.5, zorder=4)
-            ax.annotate(cliente, (lon, lat), fontsize=8, ha='center', va='bottom')
-    
-    # Estaciones sin recarga (grises)
-    for est in data2['STATIONS']:
-        if est not in estaciones_con_recarga and est in coords:
-            lat, lon = coords[est]
-            ax.scatter(lon, lat, c='lightgray', s=100, marker='^',
-                      edgecolors='gray', linewidth=1, zorder=3, alpha=0.5)
-    
-    # Estaciones CON recarga (verde brillante)
-    for est in estaciones_con_recarga:
-        if est in coords:
-            lat, lon = coords[est]
-            ax.scatter(lon, lat, c='limegreen', s=200, marker='^',
-                      edgecolors='darkgreen', linewidth=2, zorder=5)
-            ax.annotate(f"{est}\n⛽", (lon, lat), fontsize=9, ha='center', 
-                       va='bottom', fontweight='bold', color='darkgreen')
-    
-    ax.set_xlabel('Longitud', fontsize=12)
-    ax.set_ylabel('Latitud', fontsize=12)
-    ax.set_title(f'Caso 2 - Rutas con Recargas ({len(clientes_visitados)} clientes)', 
-                fontsize=14, fontweight='bold')
-    ax.grid(True, alpha=0.3)
-    ax.legend(loc='best', fontsize=10)
-    
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
-    print(f"✓ Visualización guardada: {output_path}")
-    plt.close()
-
-
 def main():
+    parser = argparse.ArgumentParser(description="Genera los outputs del Caso 2 (escenario factible)")
+    parser.add_argument('--time-limit', type=float, default=TIME_LIMIT, help="Límite de tiempo de HiGHS en segundos")
+    parser.add_argument('--gap', type=float, default=GAP_TOLERANCE, help="Gap relativo aceptable")
+    args = parser.parse_args()
+    
     print("=" * 80)
     print("GENERACIÓN DE OUTPUTS - CASO 2 (ESCENARIO OPERATIVO)")
     print("=" * 80)
@@ -406,68 +134,49 @@ def main():
     print(f"  - Clientes incluidos: {n_clientes} ({', '.join(clientes_subset)})")
     print(f"  - Estaciones: 12 (todas disponibles)")
     print(f"  - Vehículos: 5 (todos disponibles)")
-    print(f"  - Límite de tiempo: {TIME_LIMIT}s")
-    print(f"  - Gap objetivo: {GAP_TOLERANCE*100}%")
+    print(f"  - Límite de tiempo: {args.time_limit:g}s")
+    print(f"  - Gap objetivo: {args.gap*100}%")
     print()
     
+    # Marcas de tiempo por fase (carga, construcción, solve, outputs)
+    t = {}
+    
     # 2. Cargar datos completos
     print("Cargando datos del Caso 2...")
-    data_full = cargar_datos_caso2(str(DATA_CASO2), str(DATA_BASE))
+    t['carga'] = time.perf_counter()
+    data_full = cargar_datos_caso2_cache(str(DATA_CASO2), str(DATA_BASE))
     
     # 3. Filtrar al subset
-    DEPOT = data_full['DEPOT']
-    STATIONS = data_full['STATIONS']
-    VEHICLES = data_full['VEHICLES']
-    NODES_SUBSET = [DEPOT] + clientes_subset + STATIONS
-    
-    data_subset = {
-        'DEPOT': DEPOT,
-        'CLIENTS': clientes_subset,
-        'STATIONS': STATIONS,
-        'NODES': NODES_SUBSET,
-        'VEHICLES': VEHICLES,
-        'demanda': {k: v for k, v in data_full['demanda'].items() if k in clientes_subset},
-        'load_cap': data_full['load_cap'],
-        'fuel_cap': data_full['fuel_cap'],
-        'fuel_efficiency': data_full['fuel_efficiency'],
-        'fuel_price': data_full['fuel_price'],
-        'fuel_price_depot': data_full['fuel_price_depot'],
-        'dist': {(i, j): data_full['dist'][(i, j)] for i in NODES_SUBSET for j in NODES_SUBSET if i != j},
-        'C_fixed': data_full['C_fixed'],
-        'C_km': data_full['C_km'],
-        'C_time': data_full['C_time']
-    }
+    data_subset = build_subset(data_full, clientes_subset)
     
     print("[OK] Datos filtrados para escenario")
     print()
     
     # 4. Construir modelo
     print("Construyendo modelo completo con combustible...")
+    t['build'] = time.perf_counter()
     model = build_model_caso2(data_subset)
+    ajustar_cotas_combustible(model, data_subset)
     print(f"[OK] Modelo construido")
     print()
     
     # 5. Resolver
-    print(f"Resolviendo con HiGHS (límite: {TIME_LIMIT}s)...")
-    solver = pyo.SolverFactory('appsi_highs')
-    solver.options['mip_rel_gap'] = GAP_TOLERANCE
-    solver.options['time_limit'] = TIME_LIMIT
-    solver.options['output_flag'] = True
-    
-    results = solver.solve(model, tee=True)
+    print(f"Resolviendo con HiGHS (límite: {args.time_limit:g}s)...")
+    t['solve'] = time.perf_counter()
+    results = resolver(model, clientes_subset, args.time_limit, args.gap,
+                       WARM_START_PATH, verbose=DEBUG_SOLVER, data2=data_subset,
+                       log_path=HIGHS_LOG_PATH)
     
     print()
     
     # Verificar resultado
-    termination = results.solver.termination_condition
+    termination = results.termination_condition
     
-    if termination == pyo.TerminationCondition.optimal:
+    if termination == TerminationCondition.optimal:
         print("[OK] Solución ÓPTIMA encontrada")
-        model.solutions.load_from(results)
-    elif termination == pyo.TerminationCondition.maxTimeLimit:
-        if results.problem.upper_bound < float('inf'):
+    elif termination == TerminationCondition.maxTimeLimit:
+        if results.best_feasible_objective is not None:
             print("[ADVERTENCIA] Límite de tiempo alcanzado, pero hay solución factible")
-            model.solutions.load_from(results)
         else:
             print("[ERROR] No se encontró solución factible")
             sys.exit(1)
@@ -480,6 +189,7 @@ def main():
     
     # 6. Extraer solución
     print("\nExtrayendo solución...")
+    t['outputs'] = time.perf_counter()
     solucion = extraer_solucion_completa(model, data_subset)
     print(f"[OK] Vehículos usados: {solucion['num_vehiculos']}")
     print(f"[OK] Distancia total: {solucion['distancia_total']:.2f} km")
@@ -496,14 +206,17 @@ def main():
     print("GENERANDO ARCHIVOS DE SALIDA")
     print("=" * 80)
     
-    # Necesitamos pandas para la visualización
-    import pandas as pd
-    
     path_verificacion = RESULTS_DIR / 'verificacion_caso2.csv'
-    exportar_verificacion(solucion, data_subset, str(path_verificacion))
+    exportar_verificacion(solucion, data_subset, path_verificacion, formato='escenario')
     
     path_visualizacion = RESULTS_DIR / 'rutas_caso2.png'
-    visualizar_rutas(solucion, data_subset, str(path_visualizacion))
+    visualizar_rutas(solucion, data_subset, path_visualizacion,
+                     f'Caso 2 - Rutas con Recargas ({n_clientes} clientes)',
+                     dpi=PNG_DPI)
+    t['fin'] = time.perf_counter()
+    
+    print()
+    reportar_tiempos(t, TIMING_PATH)
     
     # 8. Resumen final
     print("\n" + "=" * 80)
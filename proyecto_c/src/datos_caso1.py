@@ -32,63 +32,30 @@ from pathlib import Path
 from typing import Dict, List, Tuple
 import numpy as np
 
+from distancias import matriz_distancias, matriz_distancias_cache
+
 
 # ===========================
 # FUNCIONES AUXILIARES
 # ===========================
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Calcula la distancia en kilómetros entre dos puntos geográficos usando la fórmula de Haversine.
-    
-    Args:
-        lat1, lon1: Latitud y longitud del primer punto (grados)
-        lat2, lon2: Latitud y longitud del segundo punto (grados)
-    
-    Returns:
-        Distancia en kilómetros
-    """
-    R = 6371.0  # Radio de la Tierra en km
-    
-    # Convertir grados a radianes
-    lat1_rad = np.radians(lat1)
-    lon1_rad = np.radians(lon1)
-    lat2_rad = np.radians(lat2)
-    lon2_rad = np.radians(lon2)
-    
-    # Diferencias
-    dlat = lat2_rad - lat1_rad
-    dlon = lon2_rad - lon1_rad
-    
-    # Fórmula de Haversine
-    a = np.sin(dlat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon/2)**2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-    
-    distance = R * c
-    return distance
-
-
-def construir_matriz_distancias(coords: Dict[str, Tuple[float, float]]) -> Dict[Tuple[str, str], float]:
+def construir_matriz_distancias(coords: Dict[str, Tuple[float, float]],
+                                dist_mat: np.ndarray = None) -> Dict[Tuple[str, str], float]:
     """
     Construye una matriz de distancias (diccionario) entre todos los pares de nodos.
     
     Args:
         coords: Diccionario {node_id: (lat, lon)}
+        dist_mat: Matriz ya calculada con matriz_distancias() en el orden de `coords` (opcional)
     
     Returns:
         Diccionario {(i, j): distancia_km} para todos los pares de nodos
     """
     nodos = list(coords.keys())
-    dist = {}
+    if dist_mat is None:
+        dist_mat = matriz_distancias(list(coords.values()))
     
-    for i in nodos:
-        for j in nodos:
-            if i == j:
-                dist[(i, j)] = 0.0
-            else:
-                lat_i, lon_i = coords[i]
-                lat_j, lon_j = coords[j]
-                dist[(i, j)] = haversine_distance(lat_i, lon_i, lat_j, lon_j)
+    dist = dict(zip(((i, j) for i in nodos for j in nodos), dist_mat.ravel().tolist()))
     
     return dist
 
@@ -97,13 +64,15 @@ def construir_matriz_distancias(coords: Dict[str, Tuple[float, float]]) -> Dict[
 # FUNCIÓN PRINCIPAL
 # ===========================
 
-def cargar_datos_caso1(ruta_data: str) -> Dict:
+def cargar_datos_caso1(ruta_data: str, verbose: bool = False) -> Dict:
     """
     Carga y preprocesa todos los datos necesarios para el modelo CVRP del Caso 1.
     
     Args:
         ruta_data: Ruta al directorio que contiene los archivos CSV del caso base
                    (por ejemplo: 'data/proyecto_c/caso1_base' o 'Proyecto_Caso_Base')
+        verbose: Si True, se imprime el progreso de la carga
+                 (las advertencias se muestran siempre)
     
     Returns:
         Diccionario con las siguientes claves:
@@ -121,6 +90,8 @@ def cargar_datos_caso1(ruta_data: str) -> Dict:
         
         PARÁMETROS DE DISTANCIA:
           - 'dist' (dict): {(i, j): distancia_km} matriz de distancias
+          - 'dist_mat' (np.ndarray): las mismas distancias, (N, N) indexadas por posición
+          - 'node_index' (dict): {node_id: posición en NODES}
         
         PARÁMETROS DE VEHÍCULOS:
           - 'load_cap' (dict): {vehicle_id: capacidad_kg}
@@ -150,7 +121,8 @@ def cargar_datos_caso1(ruta_data: str) -> Dict:
         if not archivo_path.exists():
             raise FileNotFoundError(f"Archivo requerido no encontrado: {archivo_path}")
     
-    print(f"✓ Archivos de datos encontrados en: {ruta_data_path}")
+    if verbose:
+        print(f"✓ Archivos de datos encontrados en: {ruta_data_path}")
     
     # =============================
     # 2. CARGAR DEPÓSITOS
@@ -159,8 +131,9 @@ def cargar_datos_caso1(ruta_data: str) -> Dict:
     
     # Validar columnas requeridas
     cols_depot_req = ['DepotID', 'StandardizedID', 'LocationID', 'Latitude', 'Longitude']
-    if not all(col in depots_df.columns for col in cols_depot_req):
-        raise ValueError(f"El archivo depots.csv debe contener las columnas: {cols_depot_req}")
+    faltantes = set(cols_depot_req) - set(depots_df.columns)
+    if faltantes:
+        raise ValueError(f"Al archivo depots.csv le faltan las columnas: {sorted(faltantes)}")
     
     # Extraer información del depósito (asumimos un único depósito)
     if len(depots_df) != 1:
@@ -171,7 +144,8 @@ def cargar_datos_caso1(ruta_data: str) -> Dict:
     depot_lon = depots_df['Longitude'].iloc[0]
     depot_location_id = depots_df['LocationID'].iloc[0]
     
-    print(f"✓ Depósito cargado: {depot_id} en ({depot_lat:.4f}, {depot_lon:.4f})")
+    if verbose:
+        print(f"✓ Depósito cargado: {depot_id} en ({depot_lat:.4f}, {depot_lon:.4f})")
     
     # =============================
     # 3. CARGAR CLIENTES
@@ -180,18 +154,20 @@ def cargar_datos_caso1(ruta_data: str) -> Dict:
     
     # Validar columnas requeridas
     cols_client_req = ['ClientID', 'StandardizedID', 'LocationID', 'Latitude', 'Longitude', 'Demand']
-    if not all(col in clients_df.columns for col in cols_client_req):
-        raise ValueError(f"El archivo clients.csv debe contener las columnas: {cols_client_req}")
+    faltantes = set(cols_client_req) - set(clients_df.columns)
+    if faltantes:
+        raise ValueError(f"Al archivo clients.csv le faltan las columnas: {sorted(faltantes)}")
     
     # Extraer información de clientes
     clients_list = clients_df['StandardizedID'].tolist()  # ['C001', 'C002', ...]
     num_clients = len(clients_list)
     
     # Construir diccionario de demandas {client_id: demanda_kg}
-    demanda = dict(zip(clients_df['StandardizedID'], clients_df['Demand']))
+    demanda = clients_df.set_index('StandardizedID')['Demand'].to_dict()
     
-    print(f"✓ Clientes cargados: {num_clients} clientes (C001 a C{num_clients:03d})")
-    print(f"  Demanda total: {sum(demanda.values()):.1f} kg")
+    if verbose:
+        print(f"✓ Clientes cargados: {num_clients} clientes (C001 a C{num_clients:03d})\n"
+              f"  Demanda total: {sum(demanda.values()):.1f} kg")
     
     # =============================
     # 4. CONSTRUIR CONJUNTOS DE NODOS
@@ -206,17 +182,21 @@ def cargar_datos_caso1(ruta_data: str) -> Dict:
     coords = {depot_id: (depot_lat, depot_lon)}
     location_id = {depot_id: depot_location_id}
     
-    for _, row in clients_df.iterrows():
-        node_id = row['StandardizedID']
-        coords[node_id] = (row['Latitude'], row['Longitude'])
-        location_id[node_id] = row['LocationID']
+    coords.update(zip(clients_df['StandardizedID'],
+                      zip(clients_df['Latitude'], clients_df['Longitude'])))
+    location_id.update(zip(clients_df['StandardizedID'], clients_df['LocationID']))
     
     # =============================
     # 6. CONSTRUIR MATRIZ DE DISTANCIAS
     # =============================
-    print("  Calculando matriz de distancias (Haversine)...")
-    dist = construir_matriz_distancias(coords)
-    print(f"✓ Matriz de distancias construida: {len(dist)} pares (i, j)")
+    if verbose:
+        print("  Calculando matriz de distancias (Haversine)...")
+    # coords se llenó en el orden de NODES: la fila k de dist_mat es NODES[k]
+    node_index = {n: k for k, n in enumerate(NODES)}
+    dist_mat = matriz_distancias_cache(list(coords.values()))
+    dist = construir_matriz_distancias(coords, dist_mat)
+    if verbose:
+        print(f"✓ Matriz de distancias construida: {len(dist)} pares (i, j)")
     
     # =============================
     # 7. CARGAR VEHÍCULOS
@@ -225,19 +205,22 @@ def cargar_datos_caso1(ruta_data: str) -> Dict:
     
     # Validar columnas requeridas
     cols_vehicle_req = ['VehicleID', 'StandardizedID', 'Capacity', 'Range']
-    if not all(col in vehicles_df.columns for col in cols_vehicle_req):
-        raise ValueError(f"El archivo vehicles.csv debe contener las columnas: {cols_vehicle_req}")
+    faltantes = set(cols_vehicle_req) - set(vehicles_df.columns)
+    if faltantes:
+        raise ValueError(f"Al archivo vehicles.csv le faltan las columnas: {sorted(faltantes)}")
     
     vehicles_list = vehicles_df['StandardizedID'].tolist()  # ['V001', 'V002', ...]
     num_vehicles = len(vehicles_list)
     
     # Construir diccionarios de capacidad y autonomía
-    load_cap = dict(zip(vehicles_df['StandardizedID'], vehicles_df['Capacity']))
-    max_dist = dict(zip(vehicles_df['StandardizedID'], vehicles_df['Range']))
+    vehicles_por_id = vehicles_df.set_index('StandardizedID')
+    load_cap = vehicles_por_id['Capacity'].to_dict()
+    max_dist = vehicles_por_id['Range'].to_dict()
     
-    print(f"✓ Vehículos cargados: {num_vehicles} vehículos (V001 a V{num_vehicles:03d})")
-    print(f"  Capacidad total de flota: {sum(load_cap.values()):.1f} kg")
-    print(f"  Autonomía promedio: {np.mean(list(max_dist.values())):.1f} km")
+    if verbose:
+        print(f"✓ Vehículos cargados: {num_vehicles} vehículos (V001 a V{num_vehicles:03d})\n"
+              f"  Capacidad total de flota: {sum(load_cap.values()):.1f} kg\n"
+              f"  Autonomía promedio: {np.mean(list(max_dist.values())):.1f} km")
     
     # VALIDACIÓN: Verificar que la capacidad total de la flota es suficiente
     demanda_total = sum(demanda.values())
@@ -273,12 +256,13 @@ def cargar_datos_caso1(ruta_data: str) -> Dict:
     # Costo de combustible (directamente de parámetros)
     cost_fuel = fuel_price  # COP/galón
     
-    print(f"✓ Parámetros de costos cargados:")
-    print(f"  - Costo fijo por vehículo: {cost_fixed:,.0f} COP")
-    print(f"  - Costo por km: {cost_km:,.0f} COP/km")
-    print(f"  - Costo por minuto: {cost_time:,.0f} COP/min")
-    print(f"  - Precio combustible: {cost_fuel:,.0f} COP/galón")
-    print(f"  - Rendimiento típico: {fuel_efficiency:.1f} km/galón")
+    if verbose:
+        print(f"✓ Parámetros de costos cargados:\n"
+              f"  - Costo fijo por vehículo: {cost_fixed:,.0f} COP\n"
+              f"  - Costo por km: {cost_km:,.0f} COP/km\n"
+              f"  - Costo por minuto: {cost_time:,.0f} COP/min\n"
+              f"  - Precio combustible: {cost_fuel:,.0f} COP/galón\n"
+              f"  - Rendimiento típico: {fuel_efficiency:.1f} km/galón")
     
     # =============================
     # 9. CONSTRUIR Y RETORNAR DICCIONARIO DE DATOS
@@ -297,6 +281,8 @@ def cargar_datos_caso1(ruta_data: str) -> Dict:
         
         # PARÁMETROS DE DISTANCIA
         'dist': dist,
+        'dist_mat': dist_mat,
+        'node_index': node_index,
         
         # PARÁMETROS DE VEHÍCULOS
         'load_cap': load_cap,
@@ -315,15 +301,17 @@ def cargar_datos_caso1(ruta_data: str) -> Dict:
         'num_vehicles': num_vehicles,
     }
     
-    print("\n" + "="*60)
-    print("RESUMEN DE DATOS CARGADOS")
-    print("="*60)
-    print(f"Nodos totales: {data['num_nodes']} (1 depósito + {data['num_clients']} clientes)")
-    print(f"Vehículos disponibles: {data['num_vehicles']}")
-    print(f"Demanda total: {demanda_total:.1f} kg")
-    print(f"Capacidad total de flota: {capacidad_total:.1f} kg")
-    print(f"Ratio capacidad/demanda: {capacidad_total/demanda_total:.2f}")
-    print("="*60 + "\n")
+    if verbose:
+        separador = "="*60
+        print(f"\n{separador}\n"
+              f"RESUMEN DE DATOS CARGADOS\n"
+              f"{separador}\n"
+              f"Nodos totales: {data['num_nodes']} (1 depósito + {data['num_clients']} clientes)\n"
+              f"Vehículos disponibles: {data['num_vehicles']}\n"
+              f"Demanda total: {demanda_total:.1f} kg\n"
+              f"Capacidad total de flota: {capacidad_total:.1f} kg\n"
+              f"Ratio capacidad/demanda: {capacidad_total/demanda_total:.2f}\n"
+              f"{separador}\n")
     
     return data
 
@@ -337,7 +325,7 @@ if __name__ == "__main__":
     
     if ruta_base.exists():
         print("Probando carga de datos del Caso Base...\n")
-        datos = cargar_datos_caso1(str(ruta_base))
+        datos = cargar_datos_caso1(str(ruta_base), verbose=True)
         
         print("\nEjemplos de datos cargados:")
         print(f"\nPrimer cliente: {datos['CLIENTS'][0]}")
@@ -54,78 +54,85 @@ Autor: Asistente IA (GitHub Copilot)
 Fecha: Noviembre 2025
 """
 
+import pickle
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Any
 import numpy as np
 
+import distancias
 
-# ===========================
-# FUNCIONES AUXILIARES
-# ===========================
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Calcula la distancia en kilómetros entre dos puntos geográficos usando la fórmula de Haversine.
-    
-    Args:
-        lat1, lon1: Latitud y longitud del primer punto (grados)
-        lat2, lon2: Latitud y longitud del segundo punto (grados)
-    
-    Returns:
-        Distancia en kilómetros
-    """
-    R = 6371.0  # Radio de la Tierra en km
-    
-    # Convertir grados a radianes
-    lat1_rad = np.radians(lat1)
-    lon1_rad = np.radians(lon1)
-    lat2_rad = np.radians(lat2)
-    lon2_rad = np.radians(lon2)
-    
-    # Diferencias
-    dlat = lat2_rad - lat1_rad
-    dlon = lon2_rad - lon1_rad
-    
-    # Fórmula de Haversine
-    a = np.sin(dlat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon/2)**2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-    
-    distance = R * c
-    return distance
+# Esquema de lectura de cada CSV: solo las columnas que usa el loader, con tipo
+# explícito. usecols es un callable para que una columna ausente no falle en
+# read_csv y la reporte la validación de cada PASO.
+def _columnas(*nombres):
+    return frozenset(nombres).__contains__
+
 
+_CSV_SCHEMAS = {
+    'depots': {
+        'usecols': _columnas('StandardizedID', 'Latitude', 'Longitude'),
+        'dtype': {'StandardizedID': str, 'Latitude': 'float64', 'Longitude': 'float64'},
+    },
+    'clients': {
+        'usecols': _columnas('StandardizedID', 'Demand', 'LocationID'),
+        'dtype': {'StandardizedID': str, 'Demand': 'float64'},
+    },
+    'clients_base': {
+        'usecols': _columnas('LocationID', 'Latitude', 'Longitude'),
+        'dtype': {'Latitude': 'float64', 'Longitude': 'float64'},
+    },
+    'stations': {
+        'usecols': _columnas('StandardizedID', 'Latitude', 'Longitude', 'FuelCost'),
+        'dtype': {'StandardizedID': str, 'Latitude': 'float64', 'Longitude': 'float64',
+                  'FuelCost': 'float64'},
+    },
+    'vehicles': {
+        'usecols': _columnas('StandardizedID', 'Capacity', 'Range'),
+        'dtype': {'StandardizedID': str, 'Capacity': 'float64', 'Range': 'float64'},
+    },
+    'parameters': {
+        'usecols': _columnas('Parameter', 'Value'),
+        'dtype': {'Parameter': str, 'Value': 'float64'},
+        'comment': '#',
+    },
+}
 
-def construir_matriz_distancias(coords: Dict[str, Tuple[float, float]], 
-                                 nodos: List[str]) -> Dict[Tuple[str, str], float]:
+
+def _leer_csv(archivo: Path, nombre: str) -> pd.DataFrame:
+    """Lee el CSV `archivo` con el esquema `nombre` de _CSV_SCHEMAS."""
+    return pd.read_csv(archivo, engine='c', **_CSV_SCHEMAS[nombre])
+
+
+def _leer_csvs(archivos: Dict[str, Path]) -> Dict[str, pd.DataFrame]:
     """
-    Construye una matriz de distancias (diccionario) entre todos los pares de nodos.
+    Lee todos los CSV de `archivos` a la vez, uno por hilo.
     
-    Args:
-        coords: Diccionario {node_id: (lat, lon)}
-        nodos: Lista de IDs de nodos a incluir en la matriz
-    
-    Returns:
-        Diccionario {(i, j): distancia_km} para todos los pares de nodos
+    Las lecturas son independientes y el parser C de pandas libera el GIL
+    mientras lee, así que el tiempo total se acerca al del archivo más lento.
+    Un error de lectura se propaga igual que con una lectura secuencial.
     """
-    dist = {}
-    
-    for i in nodos:
-        for j in nodos:
-            if i == j:
-                dist[(i, j)] = 0.0
-            else:
-                lat_i, lon_i = coords[i]
-                lat_j, lon_j = coords[j]
-                dist[(i, j)] = haversine_distance(lat_i, lon_i, lat_j, lon_j)
-    
-    return dist
+    with ThreadPoolExecutor(max_workers=len(archivos)) as executor:
+        futuros = {nombre: executor.submit(_leer_csv, archivo, nombre)
+                   for nombre, archivo in archivos.items()}
+        return {nombre: futuro.result() for nombre, futuro in futuros.items()}
+
+
+def _validar_columnas(df: pd.DataFrame, requeridas: List[str], archivo: str) -> None:
+    """Lanza ValueError nombrando las columnas de `requeridas` que faltan en `df`."""
+    faltantes = set(requeridas) - set(df.columns)
+    if faltantes:
+        raise ValueError(f"❌ ERROR: a {archivo} le faltan las columnas {sorted(faltantes)}")
 
 
 # ===========================
 # FUNCIÓN PRINCIPAL: CARGAR DATOS CASO 2
 # ===========================
 
-def cargar_datos_caso2(ruta_data: str, ruta_caso_base: str = None) -> Dict[str, Any]:
+def cargar_datos_caso2(ruta_data: str, ruta_caso_base: str = None,
+                       verbose: bool = True) -> Dict[str, Any]:
     """
     Carga todos los datos necesarios para el Caso 2 (CVRP con estaciones de recarga).
     
@@ -133,6 +140,8 @@ def cargar_datos_caso2(ruta_data: str, ruta_caso_base: str = None) -> Dict[str,
         ruta_data: Ruta absoluta o relativa a la carpeta con los archivos CSV
                    (ej. "project_c/Proyecto_C_Caso2")
         ruta_caso_base: Ruta al Caso Base para JOIN de coordenadas (opcional)
+        verbose: Si False, no se imprime el progreso de la carga
+                 (las advertencias de factibilidad se muestran siempre)
     
     Returns:
         Diccionario con las siguientes claves:
@@ -147,6 +156,8 @@ def cargar_datos_caso2(ruta_data: str, ruta_caso_base: str = None) -> Dict[str,
         PARÁMETROS TOPOLÓGICOS:
           - 'coords': dict, {node_id: (lat, lon)}
           - 'dist': dict, {(i, j): distancia_km}
+          - 'node_index': dict, {node_id: posición en NODES}
+          - 'dist_mat': np.ndarray (N, N), las mismas distancias indexadas por posición
           - 'demanda': dict, {client_id: demanda_kg} (solo clientes)
         
         PARÁMETROS DE VEHÍCULOS:
@@ -204,23 +215,25 @@ def cargar_datos_caso2(ruta_data: str, ruta_caso_base: str = None) -> Dict[str,
         'clients_base': ruta_caso_base / 'clients.csv'  # Para JOIN
     }
     
-    print(f"✓ Archivos de datos encontrados en: {ruta_base}")
-    print(f"✓ Usando coordenadas del Caso Base: {ruta_caso_base}")
+    if verbose:
+        print(f"✓ Archivos de datos encontrados en: {ruta_base}")
+        print(f"✓ Usando coordenadas del Caso Base: {ruta_caso_base}")
     
     for nombre, archivo in archivos_requeridos.items():
         if not archivo.exists():
             raise FileNotFoundError(f"❌ ERROR: No se encontró el archivo {archivo}")
     
+    # Lectura concurrente de los 6 CSV; validación y procesamiento siguen en orden
+    dfs = _leer_csvs(archivos_requeridos)
+    
     # ============================================================
     # PASO 2: CARGAR DEPÓSITO (CD01)
     # ============================================================
     
-    df_depots = pd.read_csv(archivos_requeridos['depots'])
+    df_depots = dfs['depots']
     
     # Validar columnas
-    columnas_depot = ['StandardizedID', 'Latitude', 'Longitude']
-    if not all(col in df_depots.columns for col in columnas_depot):
-        raise ValueError(f"❌ ERROR: depots.csv debe tener columnas {columnas_depot}")
+    _validar_columnas(df_depots, ['StandardizedID', 'Latitude', 'Longitude'], 'depots.csv')
     
     if len(df_depots) != 1:
         raise ValueError(f"❌ ERROR: Se esperaba 1 depósito, se encontraron {len(df_depots)}")
@@ -229,84 +242,83 @@ def cargar_datos_caso2(ruta_data: str, ruta_caso_base: str = None) -> Dict[str,
     depot_lat = float(df_depots.iloc[0]['Latitude'])
     depot_lon = float(df_depots.iloc[0]['Longitude'])
     
-    print(f"✓ Depósito cargado: {depot_id} en ({depot_lat}, {depot_lon})")
+    if verbose:
+        print(f"✓ Depósito cargado: {depot_id} en ({depot_lat}, {depot_lon})")
     
     # ============================================================
     # PASO 3: CARGAR CLIENTES (C001, C002, ...) CON JOIN
     # ============================================================
     
     # Cargar clientes del Caso 2 (atributos + demanda)
-    df_clients_caso2 = pd.read_csv(archivos_requeridos['clients'])
+    df_clients_caso2 = dfs['clients']
     
     # Validar columnas mínimas requeridas
-    columnas_client_min = ['StandardizedID', 'Demand', 'LocationID']
-    if not all(col in df_clients_caso2.columns for col in columnas_client_min):
-        raise ValueError(f"❌ ERROR: clients.csv debe tener columnas {columnas_client_min}")
+    _validar_columnas(df_clients_caso2, ['StandardizedID', 'Demand', 'LocationID'], 'clients.csv')
     
     # Cargar clientes del Caso Base (con coordenadas)
-    df_clients_base = pd.read_csv(archivos_requeridos['clients_base'])
+    df_clients_base = dfs['clients_base']
     
     # Validar que el Caso Base tenga coordenadas
-    if not all(col in df_clients_base.columns for col in ['LocationID', 'Latitude', 'Longitude']):
-        raise ValueError(f"❌ ERROR: clients.csv del Caso Base debe tener LocationID, Latitude, Longitude")
-    
-    # JOIN: Caso 2 + Caso Base usando LocationID
-    df_clients = pd.merge(
-        df_clients_caso2[['StandardizedID', 'Demand', 'LocationID']],
-        df_clients_base[['LocationID', 'Latitude', 'Longitude']],
-        on='LocationID',
-        how='left'
-    )
-    
-    # Validar que todas las coordenadas se encontraron
-    if df_clients[['Latitude', 'Longitude']].isna().any().any():
-        faltantes = df_clients[df_clients[['Latitude', 'Longitude']].isna().any(axis=1)]
-        raise ValueError(f"❌ ERROR: No se encontraron coordenadas para LocationIDs: {faltantes['LocationID'].tolist()}")
-    
-    # Extraer datos de clientes
-    clients = []
-    demanda = {}
+    _validar_columnas(df_clients_base, ['LocationID', 'Latitude', 'Longitude'],
+                      'clients.csv del Caso Base')
+    
+    # JOIN: Caso 2 + Caso Base usando LocationID, como búsqueda en un diccionario
+    # {LocationID: (lat, lon)} (las filas sin coordenadas no entran)
+    base_con_coords = df_clients_base.dropna(subset=['Latitude', 'Longitude'])
+    coords_por_location = dict(zip(
+        base_con_coords['LocationID'].tolist(),
+        zip(base_con_coords['Latitude'].tolist(), base_con_coords['Longitude'].tolist())
+    ))
+    
+    # Extraer datos de clientes (columna a columna; tolist() entrega floats de Python)
+    clients = df_clients_caso2['StandardizedID'].tolist()
+    demanda = dict(zip(clients, df_clients_caso2['Demand'].to_numpy(dtype=float).tolist()))
+    
+    # Coordenadas por cliente; los LocationID sin coordenadas se reportan juntos
     coords_clients = {}
+    faltantes = []
+    for client_id, location_id in zip(clients, df_clients_caso2['LocationID'].tolist()):
+        latlon = coords_por_location.get(location_id)
+        if latlon is None:
+            faltantes.append(location_id)
+        else:
+            coords_clients[client_id] = latlon
     
-    for _, row in df_clients.iterrows():
-        client_id = row['StandardizedID']
-        clients.append(client_id)
-        demanda[client_id] = float(row['Demand'])
-        coords_clients[client_id] = (float(row['Latitude']), float(row['Longitude']))
+    if faltantes:
+        raise ValueError(f"❌ ERROR: No se encontraron coordenadas para LocationIDs: {faltantes}")
     
     demanda_total = sum(demanda.values())
     
-    print(f"✓ Clientes cargados: {len(clients)} clientes ({clients[0]} a {clients[-1]})")
-    print(f"  Demanda total: {demanda_total} kg")
+    if verbose:
+        print(f"✓ Clientes cargados: {len(clients)} clientes ({clients[0]} a {clients[-1]})")
+        print(f"  Demanda total: {demanda_total} kg")
     
     # ============================================================
     # PASO 4: CARGAR ESTACIONES (E001, E002, ...)
     # ============================================================
     
-    df_stations = pd.read_csv(archivos_requeridos['stations'])
+    df_stations = dfs['stations']
     
     # Validar columnas
-    columnas_station = ['StandardizedID', 'Latitude', 'Longitude', 'FuelCost']
-    if not all(col in df_stations.columns for col in columnas_station):
-        raise ValueError(f"❌ ERROR: stations.csv debe tener columnas {columnas_station}")
+    _validar_columnas(df_stations, ['StandardizedID', 'Latitude', 'Longitude', 'FuelCost'],
+                      'stations.csv')
     
     # Extraer datos
-    stations = []
-    fuel_price = {}
-    coords_stations = {}
-    
-    for _, row in df_stations.iterrows():
-        station_id = row['StandardizedID']
-        stations.append(station_id)
-        fuel_price[station_id] = float(row['FuelCost'])
-        coords_stations[station_id] = (float(row['Latitude']), float(row['Longitude']))
-    
-    # Precio promedio para usar en depósito si es necesario
-    fuel_price_depot = np.mean(list(fuel_price.values()))
-    
-    print(f"✓ Estaciones cargadas: {len(stations)} estaciones ({stations[0]} a {stations[-1]})")
-    print(f"  Rango de precios: {min(fuel_price.values()):.0f} - {max(fuel_price.values()):.0f} COP/gal")
-    print(f"  Precio promedio: {fuel_price_depot:.0f} COP/gal")
+    stations = df_stations['StandardizedID'].tolist()
+    precios = df_stations['FuelCost'].to_numpy(dtype=float)
+    lat, lon = (df_stations[c].to_numpy(dtype=float).tolist() for c in ['Latitude', 'Longitude'])
+    fuel_price = dict(zip(stations, precios.tolist()))
+    coords_stations = dict(zip(stations, zip(lat, lon)))
+    
+    # Precio promedio para usar en depósito si es necesario, y rango de precios
+    # (reducciones sobre el arreglo, calculadas una sola vez)
+    fuel_price_depot = float(precios.mean())
+    precio_min, precio_max = (precios.min(), precios.max()) if len(precios) else (np.nan, np.nan)
+    
+    if verbose:
+        print(f"✓ Estaciones cargadas: {len(stations)} estaciones ({stations[0]} a {stations[-1]})")
+        print(f"  Rango de precios: {precio_min:.0f} - {precio_max:.0f} COP/gal")
+        print(f"  Precio promedio: {fuel_price_depot:.0f} COP/gal")
     
     # ============================================================
     # PASO 5: CONSTRUIR CONJUNTO DE TODOS LOS NODOS Y COORDENADAS
@@ -318,80 +330,88 @@ def cargar_datos_caso2(ruta_data: str, ruta_caso_base: str = None) -> Dict[str,
     coords.update(coords_clients)
     coords.update(coords_stations)
     
-    print(f"✓ Nodos totales: {len(nodes)} (1 depósito + {len(clients)} clientes + {len(stations)} estaciones)")
+    if verbose:
+        print(f"✓ Nodos totales: {len(nodes)} (1 depósito + {len(clients)} clientes + {len(stations)} estaciones)")
     
     # ============================================================
     # PASO 6: CONSTRUIR MATRIZ DE DISTANCIAS (HAVERSINE)
     # ============================================================
     
-    print("  Calculando matriz de distancias (Haversine)...")
-    dist = construir_matriz_distancias(coords, nodes)
-    
-    num_pares = len(nodes) ** 2
-    print(f"✓ Matriz de distancias construida: {num_pares} pares (i, j)")
-    
-    # Estadísticas de distancias
-    distancias_no_cero = [d for (i, j), d in dist.items() if i != j]
-    print(f"  Distancia promedio: {np.mean(distancias_no_cero):.1f} km")
-    print(f"  Distancia máxima: {max(distancias_no_cero):.1f} km")
+    if verbose:
+        print("  Calculando matriz de distancias (Haversine)...")
+    # Matriz densa calculada de una vez (los subconjuntos se obtienen por slicing);
+    # el diccionario para Pyomo se arma desde ella. Entre corridas la matriz se
+    # reutiliza desde el pickle de cargar_datos_caso2_cache
+    node_index = {n: k for k, n in enumerate(nodes)}
+    dist_mat = distancias.matriz_distancias([coords[n] for n in nodes])
+    dist = dict(zip(((i, j) for i in nodes for j in nodes), dist_mat.ravel().tolist()))
+    
+    if verbose:
+        num_pares = len(nodes) ** 2
+        print(f"✓ Matriz de distancias construida: {num_pares} pares (i, j)")
+        
+        # Estadísticas de distancias (fuera de la diagonal, sobre la matriz densa)
+        distancias_no_cero = dist_mat[~np.eye(len(nodes), dtype=bool)]
+        print(f"  Distancia promedio: {distancias_no_cero.mean():.1f} km")
+        print(f"  Distancia máxima: {distancias_no_cero.max():.1f} km")
     
     # ============================================================
     # PASO 7: CARGAR VEHÍCULOS (V001, V002, ...)
     # ============================================================
     
-    df_vehicles = pd.read_csv(archivos_requeridos['vehicles'])
+    df_vehicles = dfs['vehicles']
     
     # Validar columnas
-    columnas_vehicle = ['StandardizedID', 'Capacity', 'Range']
-    if not all(col in df_vehicles.columns for col in columnas_vehicle):
-        raise ValueError(f"❌ ERROR: vehicles.csv debe tener columnas {columnas_vehicle}")
-    
-    vehicles = []
-    load_cap = {}
-    vehicle_range = {}  # Autonomía en km (temporal)
+    _validar_columnas(df_vehicles, ['StandardizedID', 'Capacity', 'Range'], 'vehicles.csv')
     
-    for _, row in df_vehicles.iterrows():
-        vehicle_id = row['StandardizedID']
-        vehicles.append(vehicle_id)
-        load_cap[vehicle_id] = float(row['Capacity'])
-        vehicle_range[vehicle_id] = float(row['Range'])
+    # Arreglos paralelos a `vehicles` (las estadísticas se reducen sobre ellos);
+    # los diccionarios por ID son los que consume el modelo
+    vehicles = df_vehicles['StandardizedID'].tolist()
+    capacidad = df_vehicles['Capacity'].to_numpy(dtype=float)
+    autonomia = df_vehicles['Range'].to_numpy(dtype=float)
+    load_cap = dict(zip(vehicles, capacidad.tolist()))
     
-    capacidad_total = sum(load_cap.values())
+    capacidad_total = float(capacidad.sum())
     
-    print(f"✓ Vehículos cargados: {len(vehicles)} vehículos ({vehicles[0]} a {vehicles[-1]})")
-    print(f"  Capacidad total de flota: {capacidad_total} kg")
-    print(f"  Autonomía promedio: {np.mean(list(vehicle_range.values())):.0f} km")
+    if verbose:
+        print(f"✓ Vehículos cargados: {len(vehicles)} vehículos ({vehicles[0]} a {vehicles[-1]})")
+        print(f"  Capacidad total de flota: {capacidad_total} kg")
+        print(f"  Autonomía promedio: {autonomia.mean():.0f} km")
     
     # ============================================================
     # PASO 8: CARGAR PARÁMETROS DE RENDIMIENTO Y COSTOS
     # ============================================================
     
-    df_params = pd.read_csv(archivos_requeridos['parameters'], comment='#')
+    df_params = dfs['parameters']
+    _validar_columnas(df_params, ['Parameter', 'Value'], 'parameters_national.csv')
+    
+    # {Parameter: Value} construido una sola vez (si un nombre se repite, vale el primero)
+    params = df_params.drop_duplicates('Parameter').set_index('Parameter')['Value'].to_dict()
     
     # Función auxiliar para extraer parámetro
-    def get_param(df: pd.DataFrame, param_name: str, default_value: float = None) -> float:
-        """Extrae un parámetro del DataFrame de parámetros"""
-        row = df[df['Parameter'] == param_name]
-        if len(row) == 0:
+    def get_param(param_name: str, default_value: float = None) -> float:
+        """Extrae un parámetro del diccionario de parámetros"""
+        if param_name not in params:
             if default_value is not None:
                 return default_value
             else:
                 raise ValueError(f"❌ ERROR: Parámetro '{param_name}' no encontrado en parameters_national.csv")
-        return float(row.iloc[0]['Value'])
+        return float(params[param_name])
     
     # Rendimiento de combustible (usamos fuel_efficiency_full_min = 8 km/gal, conservador)
-    fuel_efficiency = get_param(df_params, 'fuel_efficiency_full_min', default_value=8.0)
+    fuel_efficiency = get_param('fuel_efficiency_full_min', default_value=8.0)
     
     # Costos
-    C_fixed = get_param(df_params, 'C_fixed', default_value=80000.0)
-    C_km = get_param(df_params, 'C_dist', default_value=4500.0)
-    C_time = get_param(df_params, 'C_time', default_value=9000.0)
+    C_fixed = get_param('C_fixed', default_value=80000.0)
+    C_km = get_param('C_dist', default_value=4500.0)
+    C_time = get_param('C_time', default_value=9000.0)
     
-    print(f"✓ Parámetros de costos cargados:")
-    print(f"  - Costo fijo por vehículo: {C_fixed:,.0f} COP")
-    print(f"  - Costo por km: {C_km:,.0f} COP/km")
-    print(f"  - Costo por hora: {C_time:,.0f} COP/hora")
-    print(f"  - Rendimiento combustible: {fuel_efficiency:.1f} km/galón (carga completa)")
+    if verbose:
+        print(f"✓ Parámetros de costos cargados:")
+        print(f"  - Costo fijo por vehículo: {C_fixed:,.0f} COP")
+        print(f"  - Costo por km: {C_km:,.0f} COP/km")
+        print(f"  - Costo por hora: {C_time:,.0f} COP/hora")
+        print(f"  - Rendimiento combustible: {fuel_efficiency:.1f} km/galón (carga completa)")
     
     # ============================================================
     # PASO 9: CALCULAR CAPACIDAD DE COMBUSTIBLE (FuelCap)
@@ -400,13 +420,13 @@ def cargar_datos_caso2(ruta_data: str, ruta_caso_base: str = None) -> Dict[str,
     # FuelCap = Range / fuel_efficiency
     # Esto asume que 'Range' es la autonomía máxima con tanque lleno
     
-    fuel_cap = {}
-    for v in vehicles:
-        fuel_cap[v] = vehicle_range[v] / fuel_efficiency
+    capacidad_combustible = autonomia / fuel_efficiency
+    fuel_cap = dict(zip(vehicles, capacidad_combustible.tolist()))
     
-    print(f"✓ Capacidad de combustible calculada:")
-    print(f"  - Promedio: {np.mean(list(fuel_cap.values())):.1f} galones")
-    print(f"  - Rango: {min(fuel_cap.values()):.1f} - {max(fuel_cap.values()):.1f} galones")
+    if verbose:
+        print(f"✓ Capacidad de combustible calculada:")
+        print(f"  - Promedio: {capacidad_combustible.mean():.1f} galones")
+        print(f"  - Rango: {capacidad_combustible.min():.1f} - {capacidad_combustible.max():.1f} galones")
     
     # ============================================================
     # PASO 10: CONSTRUIR DICCIONARIO DE SALIDA
@@ -423,6 +443,8 @@ def cargar_datos_caso2(ruta_data: str, ruta_caso_base: str = None) -> Dict[str,
         # PARÁMETROS TOPOLÓGICOS
         'coords': coords,
         'dist': dist,
+        'node_index': node_index,
+        'dist_mat': dist_mat,
         'demanda': demanda,
         
         # PARÁMETROS DE VEHÍCULOS
@@ -453,17 +475,18 @@ def cargar_datos_caso2(ruta_data: str, ruta_caso_base: str = None) -> Dict[str,
     # PASO 11: VALIDACIONES FINALES
     # ============================================================
     
-    print("\n" + "="*60)
-    print("RESUMEN DE DATOS CARGADOS (CASO 2)")
-    print("="*60)
-    print(f"Nodos totales: {data2['num_nodes']} (1 depósito + {data2['num_clients']} clientes + {data2['num_stations']} estaciones)")
-    print(f"Vehículos disponibles: {data2['num_vehicles']}")
-    print(f"Demanda total: {data2['demanda_total']} kg")
-    print(f"Capacidad total de flota: {data2['capacidad_total_flota']} kg")
-    print(f"Ratio capacidad/demanda: {data2['ratio_capacidad_demanda']:.2f}")
-    print(f"Estaciones disponibles: {data2['num_stations']}")
-    print(f"Rango de precios combustible: {min(fuel_price.values()):.0f} - {max(fuel_price.values()):.0f} COP/gal")
-    print("="*60 + "\n")
+    if verbose:
+        print("\n" + "="*60)
+        print("RESUMEN DE DATOS CARGADOS (CASO 2)")
+        print("="*60)
+        print(f"Nodos totales: {data2['num_nodes']} (1 depósito + {data2['num_clients']} clientes + {data2['num_stations']} estaciones)")
+        print(f"Vehículos disponibles: {data2['num_vehicles']}")
+        print(f"Demanda total: {data2['demanda_total']} kg")
+        print(f"Capacidad total de flota: {data2['capacidad_total_flota']} kg")
+        print(f"Ratio capacidad/demanda: {data2['ratio_capacidad_demanda']:.2f}")
+        print(f"Estaciones disponibles: {data2['num_stations']}")
+        print(f"Rango de precios combustible: {precio_min:.0f} - {precio_max:.0f} COP/gal")
+        print("="*60 + "\n")
     
     # Validaciones
     if data2['ratio_capacidad_demanda'] < 1.0:
@@ -477,6 +500,72 @@ def cargar_datos_caso2(ruta_data: str, ruta_caso_base: str = None) -> Dict[str,
     return data2
 
 
+# ===========================
+# CACHÉ EN DISCO ENTRE EJECUCIONES
+# ===========================
+
+def _max_mtime(*rutas) -> float:
+    """Mayor fecha de modificación entre los archivos de las carpetas dadas."""
+    mtimes = [0.0]
+    for ruta in rutas:
+        if ruta is None:
+            continue
+        ruta = Path(ruta)
+        if ruta.is_dir():
+            mtimes.extend(f.stat().st_mtime for f in ruta.iterdir() if f.is_file())
+        elif ruta.exists():
+            mtimes.append(ruta.stat().st_mtime)
+    return max(mtimes)
+
+
+def cargar_datos_caso2_cache(ruta_data: str, ruta_caso_base: str = None,
+                             cache_path: str = None, verbose: bool = True) -> Dict[str, Any]:
+    """
+    Igual que cargar_datos_caso2(), pero guarda el resultado en un pickle.
+    
+    La clave de la caché es la fecha de modificación más reciente de los CSV de
+    entrada, de este módulo y de distancias.py (que calcula la matriz guardada):
+    si ninguno cambió desde la última ejecución, el diccionario se lee del pickle
+    sin volver a parsear los CSV ni recalcular distancias.
+    
+    Args:
+        ruta_data: Carpeta con los CSV del Caso 2
+        ruta_caso_base: Carpeta del Caso Base (opcional)
+        cache_path: Archivo .pkl de la caché (por defecto `_cache/datos_caso2.pkl`
+                    junto a la carpeta src/)
+        verbose: Se pasa a cargar_datos_caso2() cuando hay que recargar
+    
+    Returns:
+        Diccionario con la misma estructura que cargar_datos_caso2()
+    """
+    if cache_path is None:
+        cache_path = Path(__file__).resolve().parent.parent / '_cache' / 'datos_caso2.pkl'
+    cache_path = Path(cache_path)
+    
+    clave = (str(Path(ruta_data).resolve()),
+             str(Path(ruta_caso_base).resolve()) if ruta_caso_base else None,
+             _max_mtime(ruta_data, ruta_caso_base, __file__, distancias.__file__))
+    
+    if cache_path.exists():
+        try:
+            with open(cache_path, 'rb') as f:
+                contenido = pickle.load(f)
+            if contenido.get('clave') == clave:
+                if verbose:
+                    print(f"✓ Datos del Caso 2 leídos de caché: {cache_path}")
+                return contenido['data']
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            print(f"⚠️  Caché ilegible ({e}); se recargan los CSV")
+    
+    data2 = cargar_datos_caso2(ruta_data, ruta_caso_base, verbose)
+    
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_path, 'wb') as f:
+        pickle.dump({'clave': clave, 'data': data2}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    return data2
+
+
 # ===========================
 # FUNCIÓN DE PRUEBA (OPCIONAL)
 # ===========================
@@ -507,25 +596,28 @@ if __name__ == "__main__":
         # Mostrar algunas estadísticas adicionales
         print("\n📊 ESTADÍSTICAS ADICIONALES:\n")
         
+        # Fila del depósito en la matriz densa, separada en clientes y estaciones
+        node_index = data['node_index']
+        fila_depot = data['dist_mat'][node_index[data['DEPOT']]]
+        dist_depot_clients = fila_depot[[node_index[c] for c in data['CLIENTS']]]
+        dist_depot_stations = fila_depot[[node_index[e] for e in data['STATIONS']]]
+        
         # Distancia promedio desde depósito a clientes
-        dist_depot_clients = [data['dist'][(data['DEPOT'], c)] for c in data['CLIENTS']]
-        print(f"Distancia promedio depot → clientes: {np.mean(dist_depot_clients):.1f} km")
+        print(f"Distancia promedio depot → clientes: {dist_depot_clients.mean():.1f} km")
         
         # Distancia promedio desde depósito a estaciones
-        dist_depot_stations = [data['dist'][(data['DEPOT'], e)] for e in data['STATIONS']]
-        print(f"Distancia promedio depot → estaciones: {np.mean(dist_depot_stations):.1f} km")
+        print(f"Distancia promedio depot → estaciones: {dist_depot_stations.mean():.1f} km")
         
         # Cliente más cercano y más lejano
-        closest_client = min(data['CLIENTS'], key=lambda c: data['dist'][(data['DEPOT'], c)])
-        farthest_client = max(data['CLIENTS'], key=lambda c: data['dist'][(data['DEPOT'], c)])
-        print(f"Cliente más cercano al depot: {closest_client} ({data['dist'][(data['DEPOT'], closest_client)]:.1f} km)")
-        print(f"Cliente más lejano del depot: {farthest_client} ({data['dist'][(data['DEPOT'], farthest_client)]:.1f} km)")
+        k_min, k_max = dist_depot_clients.argmin(), dist_depot_clients.argmax()
+        print(f"Cliente más cercano al depot: {data['CLIENTS'][k_min]} ({dist_depot_clients[k_min]:.1f} km)")
+        print(f"Cliente más lejano del depot: {data['CLIENTS'][k_max]} ({dist_depot_clients[k_max]:.1f} km)")
         
         # Estación más barata y más cara
-        cheapest_station = min(data['STATIONS'], key=lambda e: data['fuel_price'][e])
-        expensive_station = max(data['STATIONS'], key=lambda e: data['fuel_price'][e])
-        print(f"Estación más barata: {cheapest_station} ({data['fuel_price'][cheapest_station]:.0f} COP/gal)")
-        print(f"Estación más cara: {expensive_station} ({data['fuel_price'][expensive_station]:.0f} COP/gal)")
+        precios = np.array([data['fuel_price'][e] for e in data['STATIONS']])
+        k_min, k_max = precios.argmin(), precios.argmax()
+        print(f"Estación más barata: {data['STATIONS'][k_min]} ({precios[k_min]:.0f} COP/gal)")
+        print(f"Estación más cara: {data['STATIONS'][k_max]} ({precios[k_max]:.0f} COP/gal)")
         
         print("\n" + "="*70)
         
@@ -7,23 +7,23 @@ from pathlib import Path
 import pandas as pd
 import numpy as np
 
-# ---------------------------------------------
-# Haversine
-# ---------------------------------------------
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371.0
-    phi1 = np.radians(lat1)
-    phi2 = np.radians(lat2)
-    dphi = np.radians(lat2 - lat1)
-    dlambda = np.radians(lon2 - lon1)
-    a = np.sin(dphi/2)**2 + np.cos(phi1)*np.cos(phi2)*np.sin(dlambda/2)**2
-    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+from distancias import matriz_distancias_cache
 
+# Columnas numéricas de los CSV del Caso 3: con el tipo explícito pandas no
+# tiene que inferirlo (las columnas ausentes en un archivo se ignoran)
+_DTYPES = {
+    "Latitude": "float64", "Longitude": "float64",
+    "Demand": "float64", "MaxWeight": "float64",
+    "Capacity": "float64", "Range": "float64",
+    "FuelCost": "float64", "BaseRate": "float64", "RatePerTon": "float64",
+}
 
 # ---------------------------------------------
 # Cargar datos del Caso 3
 # ---------------------------------------------
 def cargar_datos_caso3(ruta_caso3: Path, ruta_caso_base: Path):
+    # La matriz de distancias ya se reutiliza entre corridas por la caché .npy
+    # (distancias.matriz_distancias_cache); los CSV se leen en cada llamada
 
     ruta_caso3 = Path(ruta_caso3)
     ruta_caso_base = Path(ruta_caso_base)
@@ -31,7 +31,7 @@ def cargar_datos_caso3(ruta_caso3: Path, ruta_caso_base: Path):
     # ---------------------------------------------------------
     # 1. DEPOT
     # ---------------------------------------------------------
-    df_dep = pd.read_csv(ruta_caso3 / "depots.csv")
+    df_dep = pd.read_csv(ruta_caso3 / "depots.csv", dtype=_DTYPES)
     depot_id = df_dep.iloc[0]["StandardizedID"]
     depot_lat = float(df_dep.iloc[0]["Latitude"])
     depot_lon = float(df_dep.iloc[0]["Longitude"])
@@ -39,8 +39,8 @@ def cargar_datos_caso3(ruta_caso3: Path, ruta_caso_base: Path):
     # ---------------------------------------------------------
     # 2. CLIENTS (join con Caso Base para coords)
     # ---------------------------------------------------------
-    df_c3 = pd.read_csv(ruta_caso3 / "clients.csv")
-    df_base = pd.read_csv(ruta_caso_base / "clients.csv")
+    df_c3 = pd.read_csv(ruta_caso3 / "clients.csv", dtype=_DTYPES)
+    df_base = pd.read_csv(ruta_caso_base / "clients.csv", dtype=_DTYPES)
 
     df_clients = pd.merge(
         df_c3,
@@ -49,69 +49,60 @@ def cargar_datos_caso3(ruta_caso3: Path, ruta_caso_base: Path):
         how="left"
     )
 
-    CLIENTS = list(df_clients["StandardizedID"])
+    CLIENTS = df_clients["StandardizedID"].tolist()
 
-    demanda = {row["StandardizedID"]: float(row["Demand"])
-               for _, row in df_clients.iterrows()}
+    # columna a columna (sin iterrows); tolist() entrega floats de Python
+    dem, lat, lon = (df_clients[c].to_numpy(dtype=float).tolist()
+                     for c in ("Demand", "Latitude", "Longitude"))
 
-    max_weight = {
-        row["StandardizedID"]: (
-            float(row["MaxWeight"]) if not pd.isna(row["MaxWeight"]) else float("inf")
-        )
-        for _, row in df_clients.iterrows()
-    }
+    demanda = dict(zip(CLIENTS, dem))
 
-    coords_clients = {
-        row["StandardizedID"]: (float(row["Latitude"]), float(row["Longitude"]))
-        for _, row in df_clients.iterrows()
-    }
+    # sin restricción de peso (NaN) → inf
+    mw = df_clients["MaxWeight"].to_numpy(dtype=float)
+    max_weight = dict(zip(CLIENTS, np.where(np.isnan(mw), np.inf, mw).tolist()))
+
+    coords_clients = dict(zip(CLIENTS, zip(lat, lon)))
 
     # mapa ClientID → StandardizedID para peajes
-    map_clientid_std = {
-        int(row["ClientID"]): row["StandardizedID"]
-        for _, row in df_c3.iterrows()
-    }
+    map_clientid_std = dict(zip(df_c3["ClientID"].astype(int).tolist(),
+                                df_c3["StandardizedID"].tolist()))
 
     # ---------------------------------------------------------
     # 3. STATIONS
     # ---------------------------------------------------------
-    df_st = pd.read_csv(ruta_caso3 / "stations.csv")
+    df_st = pd.read_csv(ruta_caso3 / "stations.csv", dtype=_DTYPES)
 
-    STATIONS = list(df_st["StandardizedID"])
+    STATIONS = df_st["StandardizedID"].tolist()
 
-    fuel_price = {
-        row["StandardizedID"]: float(row["FuelCost"])
-        for _, row in df_st.iterrows()
-    }
+    precios = df_st["FuelCost"].to_numpy(dtype=float)
+    lat, lon = (df_st[c].to_numpy(dtype=float).tolist() for c in ("Latitude", "Longitude"))
 
-    coords_stations = {
-        row["StandardizedID"]: (float(row["Latitude"]), float(row["Longitude"]))
-        for _, row in df_st.iterrows()
-    }
+    fuel_price = dict(zip(STATIONS, precios.tolist()))
+
+    coords_stations = dict(zip(STATIONS, zip(lat, lon)))
 
-    fuel_price_depot = float(np.mean(list(fuel_price.values())))
+    fuel_price_depot = float(precios.mean())
 
     # ---------------------------------------------------------
     # 4. VEHICLES
     # ---------------------------------------------------------
-    df_veh = pd.read_csv(ruta_caso3 / "vehicles.csv")
+    df_veh = pd.read_csv(ruta_caso3 / "vehicles.csv", dtype=_DTYPES)
 
-    VEHICLES = list(df_veh["StandardizedID"])
+    VEHICLES = df_veh["StandardizedID"].tolist()
 
-    load_cap = {row["StandardizedID"]: float(row["Capacity"])
-                for _, row in df_veh.iterrows()}
+    load_cap = dict(zip(VEHICLES, df_veh["Capacity"].to_numpy(dtype=float).tolist()))
 
-    vehicle_range = {row["StandardizedID"]: float(row["Range"])
-                     for _, row in df_veh.iterrows()}
+    vehicle_range = dict(zip(VEHICLES, df_veh["Range"].to_numpy(dtype=float).tolist()))
 
     # combustible
-    df_params = pd.read_csv(ruta_caso3 / "parameters_national.csv")
+    df_params = pd.read_csv(ruta_caso3 / "parameters_national.csv", comment="#",
+                            dtype={"Value": "float64"})
+
+    # {Parameter: Value} una sola vez; si un nombre se repite, vale el primero
+    params = df_params.drop_duplicates("Parameter").set_index("Parameter")["Value"].to_dict()
 
     def get_param(name, default):
-        row = df_params[df_params["Parameter"] == name]
-        if len(row) == 0:
-            return default
-        return float(row.iloc[0]["Value"])
+        return float(params[name]) if name in params else default
 
     fuel_eff = get_param("fuel_efficiency_full_min", 8.0)
     C_fixed = get_param("C_fixed", 80000)
@@ -126,25 +117,17 @@ def cargar_datos_caso3(ruta_caso3: Path, ruta_caso_base: Path):
     # ---------------------------------------------------------
     # 5. TOLLS
     # ---------------------------------------------------------
-    df_tolls = pd.read_csv(ruta_caso3 / "tolls.csv")
+    df_tolls = pd.read_csv(ruta_caso3 / "tolls.csv", dtype=_DTYPES)
 
-    TOLLS = list(df_tolls["StandardizedID"])
+    TOLLS = df_tolls["StandardizedID"].tolist()
 
-    toll_base_rate = {
-        row["StandardizedID"]: float(row["BaseRate"])
-        for _, row in df_tolls.iterrows()
-    }
+    toll_base_rate = dict(zip(TOLLS, df_tolls["BaseRate"].to_numpy(dtype=float).tolist()))
 
-    toll_rate_per_ton = {
-        row["StandardizedID"]: float(row["RatePerTon"])
-        for _, row in df_tolls.iterrows()
-    }
+    toll_rate_per_ton = dict(zip(TOLLS, df_tolls["RatePerTon"].to_numpy(dtype=float).tolist()))
 
     toll_client = {}
-    for _, row in df_tolls.iterrows():
-        p = row["StandardizedID"]
-        cid = row["ClientID"]
-        if not pd.isna(cid) and int(cid) in map_clientid_std:
+    for p, cid in zip(TOLLS, df_tolls["ClientID"].to_numpy(dtype=float).tolist()):
+        if not np.isnan(cid) and int(cid) in map_clientid_std:
             toll_client[p] = map_clientid_std[int(cid)]
         else:
             toll_client[p] = ""
@@ -158,15 +141,14 @@ def cargar_datos_caso3(ruta_caso3: Path, ruta_caso_base: Path):
 
     NODES = [depot_id] + CLIENTS + STATIONS
 
-    dist = {}
-    for i in NODES:
-        for j in NODES:
-            if i == j:
-                dist[(i, j)] = 0.0
-            else:
-                lat1, lon1 = coords[i]
-                lat2, lon2 = coords[j]
-                dist[(i, j)] = haversine(lat1, lon1, lat2, lon2)
+    # Fila/columna k de dist_mat = NODES[k]
+    node_index = {n: k for k, n in enumerate(NODES)}
+    dist_mat = matriz_distancias_cache(np.array([coords[n] for n in NODES], dtype=float))
+    # Solo los pares que el modelo indexa: los arcos de model.A (i != j).
+    # Los trayectos estación→estación se conservan, pueden hacer falta por autonomía.
+    dist = {(i, j): d
+            for i, fila in zip(NODES, dist_mat.tolist())
+            for j, d in zip(NODES, fila) if i != j}
 
     # ---------------------------------------------------------
     # RETORNO FINAL
@@ -180,6 +162,8 @@ def cargar_datos_caso3(ruta_caso3: Path, ruta_caso_base: Path):
 
         "coords": coords,
         "dist": dist,
+        "dist_mat": dist_mat,
+        "node_index": node_index,
 
         "demanda": demanda,
         "load_cap": load_cap,
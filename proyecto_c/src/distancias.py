@@ -0,0 +1,125 @@
+"""
+distancias.py
+-------------
+Distancias Haversine entre nodos, compartidas por los cargadores de datos de los
+tres casos (datos_caso1, datos_caso2, datos_caso3).
+
+La matriz densa se calcula en una sola operación vectorial y se guarda en una
+caché `.npy` nombrada con un hash de las coordenadas: si los CSV no cambiaron,
+la siguiente corrida la lee del disco en lugar de recalcularla.
+
+Autor: Proyecto C
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Carpeta por defecto de la caché (`_cache/` junto a la carpeta src/)
+CACHE_DIR = Path(__file__).resolve().parent.parent / '_cache'
+
+
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Calcula la distancia en kilómetros entre dos puntos geográficos usando la fórmula de Haversine.
+
+    Args:
+        lat1, lon1: Latitud y longitud del primer punto (grados)
+        lat2, lon2: Latitud y longitud del segundo punto (grados)
+
+    Returns:
+        Distancia en kilómetros
+    """
+    return haversine_radianes(np.radians(lat1), np.radians(lon1),
+                              np.radians(lat2), np.radians(lon2))
+
+
+def haversine_radianes(lat1_rad, lon1_rad, lat2_rad, lon2_rad):
+    """
+    Igual que haversine_distance(), pero con las coordenadas ya en radianes.
+
+    Opera elemento a elemento con NumPy, así que acepta arreglos de coordenadas.
+    """
+    R = 6371.0  # Radio de la Tierra en km
+
+    dlat = lat2_rad - lat1_rad
+    dlon = lon2_rad - lon1_rad
+
+    a = np.sin(dlat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon/2)**2
+    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+
+def matriz_distancias(coords_array) -> np.ndarray:
+    """
+    Calcula la matriz densa de distancias entre todos los nodos.
+
+    Cada nodo se pasa a radianes una sola vez. Como la distancia es simétrica y
+    nula en la diagonal, solo se evalúa el triángulo superior y se refleja sobre
+    el inferior.
+
+    Args:
+        coords_array: Arreglo (N, 2) con (lat, lon) en grados; su orden define
+                      filas y columnas
+
+    Returns:
+        np.ndarray (N, N) con la distancia en km entre cada par de nodos
+    """
+    lat, lon = np.radians(np.asarray(coords_array, dtype=np.float64)).T
+    fil, col = np.triu_indices(len(lat), 1)
+    d = haversine_radianes(lat[fil], lon[fil], lat[col], lon[col])
+    dist_mat = np.zeros((len(lat), len(lat)))
+    dist_mat[fil, col] = d
+    dist_mat[col, fil] = d
+    return dist_mat
+
+
+def matriz_distancias_cache(coords_array, cache_dir=None) -> np.ndarray:
+    """
+    Igual que matriz_distancias(), pero guarda la matriz en un .npy.
+
+    El nombre del archivo es un hash de las coordenadas (en el orden dado), así
+    que la caché solo se reutiliza para exactamente los mismos nodos. Una caché
+    ilegible se avisa y se recalcula.
+
+    La matriz se lee completa (sin mmap): el resultado es siempre un ndarray en
+    memoria, igual en la primera corrida que en las siguientes, y el archivo no
+    queda abierto. La escritura va a un temporal que luego se renombra, así que
+    una corrida interrumpida no deja un .npy truncado con el nombre definitivo.
+
+    Args:
+        coords_array: Arreglo (N, 2) con (lat, lon) en grados
+        cache_dir: Carpeta de la caché (por defecto CACHE_DIR)
+
+    Returns:
+        np.ndarray (N, N) con la distancia en km entre cada par de nodos
+    """
+    cache_dir = Path(cache_dir) if cache_dir is not None else CACHE_DIR
+
+    coords_array = np.ascontiguousarray(coords_array, dtype=np.float64)
+    clave = hashlib.blake2b(coords_array.tobytes(), digest_size=8).hexdigest()
+    cache_path = cache_dir / f'dist_{clave}.npy'
+
+    if cache_path.exists():
+        try:
+            dist_mat = np.load(cache_path)
+            if dist_mat.shape == (len(coords_array), len(coords_array)):
+                return dist_mat
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Caché de distancias ilegible ({e}); se recalcula")
+
+    dist_mat = matriz_distancias(coords_array)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=cache_path.stem, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, dist_mat)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return dist_mat
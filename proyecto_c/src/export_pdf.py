@@ -8,7 +8,6 @@ Alternativas si WeasyPrint no funciona:
 3. Usar servicio web: https://www.markdowntopdf.com/
 """
 
-import os
 from pathlib import Path
 
 def export_markdown_to_pdf():
@@ -0,0 +1,247 @@
+"""
+heuristica_caso2.py
+-------------------
+Solución inicial heurística para el Caso 2 (MIP start de HiGHS).
+
+Sin un incumbente, HiGHS gasta buena parte del límite de tiempo buscando la
+primera solución factible del modelo con combustible. Este módulo construye una
+solución factible barata y la carga en las variables del modelo:
+
+  1. Clarke-Wright (ahorros) sobre los clientes, aceptando solo fusiones cuyas
+     cargas sigan cabiendo en la flota (heterogénea).
+  2. 2-opt dentro de cada ruta.
+  3. Asignación de rutas a vehículos (mayor carga → mayor capacidad).
+  4. Inserción greedy de estaciones donde el tanque no alcanza para el
+     siguiente tramo (recarga a tanque lleno).
+
+Si algún paso no es factible (más rutas que vehículos, tramo sin estación
+alcanzable, ...) se retorna None y el modelo se resuelve en frío.
+
+Autor: Proyecto C - Caso 2
+"""
+
+from typing import Any, Dict, List, Optional
+
+import pyomo.environ as pyo
+
+
+def _asignable(cargas: List[float], caps_desc: List[float]) -> bool:
+    """
+    True si las rutas más cargadas caben en los vehículos más grandes (una ruta
+    por vehículo). Emparejar ambos ordenados de mayor a menor es exacto.
+    """
+    return all(c <= k for c, k in zip(sorted(cargas, reverse=True), caps_desc))
+
+
+def _ahorros_clarke_wright(clientes: List[str], demanda: Dict[str, float], caps: List[float],
+                           d, depot: str) -> List[List[str]]:
+    """
+    Rutas de Clarke-Wright (versión paralela) para una flota heterogénea: una fusión
+    solo se acepta si las cargas resultantes siguen siendo asignables a la flota.
+    """
+    caps_desc = sorted(caps, reverse=True)
+    ruta_de = {c: [c] for c in clientes}
+    carga = {c: demanda[c] for c in clientes}  # Carga indexada por el primer cliente de la ruta
+
+    ahorros = sorted(
+        ((d(depot, i) + d(depot, j) - d(i, j), i, j)
+         for a, i in enumerate(clientes) for j in clientes[a + 1:]),
+        reverse=True
+    )
+
+    for ahorro, i, j in ahorros:
+        if ahorro <= 0:
+            break
+        ruta_i, ruta_j = ruta_de[i], ruta_de[j]
+        if ruta_i is ruta_j:
+            continue
+        # i y j deben ser extremos de sus rutas
+        if i not in (ruta_i[0], ruta_i[-1]) or j not in (ruta_j[0], ruta_j[-1]):
+            continue
+        clave_i, clave_j = ruta_i[0], ruta_j[0]
+        carga_nueva = carga[clave_i] + carga[clave_j]
+        cargas = [q for c, q in carga.items() if c != clave_i and c != clave_j]
+        if not _asignable(cargas + [carga_nueva], caps_desc):
+            continue
+
+        # Orientar para que quede ... i, j ...
+        if ruta_i[-1] != i:
+            ruta_i = ruta_i[::-1]
+        if ruta_j[0] != j:
+            ruta_j = ruta_j[::-1]
+        nueva = ruta_i + ruta_j
+
+        for c in nueva:
+            ruta_de[c] = nueva
+        del carga[clave_i], carga[clave_j]
+        carga[nueva[0]] = carga_nueva
+
+    rutas = []
+    vistas = set()
+    for ruta in ruta_de.values():
+        if id(ruta) not in vistas:
+            vistas.add(id(ruta))
+            rutas.append(ruta)
+    return rutas
+
+
+def _dos_opt(ruta: List[str], d, depot: str) -> List[str]:
+    """Mejora 2-opt de una ruta depot → ruta → depot (primera mejora)."""
+    tour = [depot] + ruta + [depot]
+    mejora = True
+    while mejora:
+        mejora = False
+        for a in range(1, len(tour) - 2):
+            for b in range(a + 1, len(tour) - 1):
+                delta = (d(tour[a - 1], tour[b]) + d(tour[a], tour[b + 1])
+                         - d(tour[a - 1], tour[a]) - d(tour[b], tour[b + 1]))
+                if delta < -1e-9:
+                    tour[a:b + 1] = tour[a:b + 1][::-1]
+                    mejora = True
+    return tour[1:-1]
+
+
+def _insertar_estaciones(ruta: List[str], estaciones: List[str], fuel_cap: float,
+                         eficiencia: float, d, depot: str) -> Optional[Dict[str, Any]]:
+    """
+    Recorre depot → ruta → depot e inserta la estación de menor desvío cuando el
+    combustible no alcanza para el siguiente tramo.
+
+    Returns:
+        {'ruta': [...], 'combustible': {nodo: gal}, 'recarga': {nodo: gal}} o None
+    """
+    tour = [depot]
+    combustible = {depot: fuel_cap}
+    recarga = {}
+    fuel = fuel_cap
+    prev = depot
+
+    for nxt in ruta + [depot]:
+        consumo = d(prev, nxt) / eficiencia
+        if consumo > fuel:
+            # Estación alcanzable desde prev y desde la cual (tanque lleno) se llega a nxt
+            candidatas = [
+                s for s in estaciones
+                if s not in recarga
+                and d(prev, s) / eficiencia <= fuel
+                and d(s, nxt) / eficiencia <= fuel_cap
+            ]
+            if not candidatas:
+                return None
+            est = min(candidatas, key=lambda s: d(prev, s) + d(s, nxt))
+            llegada = fuel - d(prev, est) / eficiencia
+            recarga[est] = fuel_cap - llegada
+            combustible[est] = fuel_cap
+            tour.append(est)
+            fuel = fuel_cap
+            prev = est
+            consumo = d(prev, nxt) / eficiencia
+
+        fuel -= consumo
+        tour.append(nxt)
+        if nxt != depot:
+            combustible[nxt] = fuel
+        prev = nxt
+
+    return {'ruta': tour, 'combustible': combustible, 'recarga': recarga}
+
+
+def construir_solucion_inicial(data2: Dict[str, Any]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Construye una solución factible para el modelo del Caso 2.
+
+    Args:
+        data2: Diccionario con 'node_index' y 'dist_mat' (cargar_datos_caso2 o build_subset)
+
+    Returns:
+        {vehículo: {'ruta': [depot, ..., depot], 'combustible': {...}, 'recarga': {...}}}
+        solo con los vehículos usados, o None si la heurística no encuentra solución
+    """
+    DEPOT = data2['DEPOT']
+    CLIENTS = list(data2['CLIENTS'])
+    demanda = data2['demanda']
+    load_cap = data2['load_cap']
+    fuel_cap = data2['fuel_cap']
+    node_index = data2['node_index']
+    dist = data2['dist_mat'].tolist()
+
+    def d(i, j):
+        return dist[node_index[i]][node_index[j]]
+
+    if not CLIENTS:
+        return {}
+
+    rutas = _ahorros_clarke_wright(CLIENTS, demanda, list(load_cap.values()), d, DEPOT)
+    rutas = [_dos_opt(r, d, DEPOT) for r in rutas]
+
+    # Mayor carga → vehículo de mayor capacidad (desempate: mayor tanque). El sort es
+    # estable: entre vehículos idénticos se respeta el orden de VEHICLES (orden_vehiculos)
+    rutas.sort(key=lambda r: sum(demanda[c] for c in r), reverse=True)
+    vehiculos = sorted(data2['VEHICLES'], key=lambda v: (load_cap[v], fuel_cap[v]), reverse=True)
+    if len(rutas) > len(vehiculos):
+        return None
+
+    solucion = {}
+    for ruta, v in zip(rutas, vehiculos):
+        if sum(demanda[c] for c in ruta) > load_cap[v]:
+            return None
+        detalle = _insertar_estaciones(ruta, data2['STATIONS'], fuel_cap[v],
+                                       data2['fuel_efficiency'], d, DEPOT)
+        if detalle is None:
+            return None
+        solucion[v] = detalle
+
+    return solucion
+
+
+def cargar_solucion_inicial(model: pyo.ConcreteModel, data2: Dict[str, Any],
+                            solucion: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Asigna la solución heurística a las variables del modelo (x, y, cargo,
+    combustible, recarga). El solver debe usar `config.warmstart = True`.
+
+    Los valores de nodos no visitados se eligen para que las restricciones Big-M
+    de los arcos inactivos también se cumplan.
+    """
+    DEPOT = data2['DEPOT']
+    CLIENT_SET = frozenset(data2['CLIENTS'])
+    demanda = data2['demanda']
+
+    activos = set()
+    for v, det in solucion.items():
+        ruta = det['ruta']
+        activos.update((v, i, j) for i, j in zip(ruta, ruta[1:]))
+    for idx, var in model.x.items():
+        var.set_value(1 if idx in activos else 0)
+
+    for v in model.V:
+        det = solucion.get(v)
+        model.y[v].set_value(1 if det else 0)
+
+        # Carga acumulada a lo largo de la ruta
+        cargo = {DEPOT: 0.0}
+        if det:
+            acumulada = 0.0
+            for nodo in det['ruta'][1:-1]:
+                if nodo in CLIENT_SET:
+                    acumulada += demanda[nodo]
+                cargo[nodo] = acumulada
+        carga_max = max(cargo.values())
+        cap = pyo.value(model.load_cap[v])
+
+        for i in model.N:
+            if i in cargo:
+                model.cargo[v, i].set_value(cargo[i])
+            else:
+                # cargo[j] >= cargo[i] + dem_j - cap en arcos con x = 0
+                model.cargo[v, i].set_value(max(0.0, carga_max + demanda.get(i, 0) - cap))
+
+            if det and i in det['combustible']:
+                model.combustible[v, i].set_value(det['combustible'][i], skip_validation=True)
+            elif i == DEPOT:
+                model.combustible[v, i].set_value(pyo.value(model.fuel_cap[v]))
+            else:
+                model.combustible[v, i].set_value(0.0)
+
+            model.recarga[v, i].set_value(det['recarga'].get(i, 0.0) if det else 0.0,
+                                          skip_validation=True)
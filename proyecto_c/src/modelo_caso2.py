@@ -10,10 +10,13 @@ Usa el solver HiGHS (highs) para resolver el problema.
 Autor: Proyecto C - Caso 2
 """
 
+import numpy as np
 import pyomo.environ as pyo
 from pyomo.opt import SolverFactory
 from typing import Dict, List, Tuple, Any
 
+import warm_start
+
 
 def build_model_caso2(data2: dict, scale_fuel_cost: float = 0.001) -> pyo.ConcreteModel:
     """
@@ -42,6 +45,7 @@ def build_model_caso2(data2: dict, scale_fuel_cost: float = 0.001) -> pyo.Concre
     - Balance de combustible
     - Límites de capacidad (carga y tanque)
     - Recargas solo en estaciones y depósito
+    - Orden de uso entre vehículos idénticos (ruptura de simetría)
     """
     
     # =========================================================================
@@ -53,6 +57,7 @@ def build_model_caso2(data2: dict, scale_fuel_cost: float = 0.001) -> pyo.Concre
     STATIONS = data2['STATIONS']
     NODES = data2['NODES']
     VEHICLES = data2['VEHICLES']
+    CLIENT_SET = frozenset(CLIENTS)  # Pertenencia O(1) dentro de las reglas por arco
     
     dist = data2['dist']
     demanda = data2['demanda']
@@ -242,7 +247,7 @@ def build_model_caso2(data2: dict, scale_fuel_cost: float = 0.001) -> pyo.Concre
         # Big-M: Exactamente la capacidad del vehículo (tight bound)
         M = m.load_cap[v]
         
-        demanda_j = demanda[j] if j in CLIENTS else 0
+        demanda_j = demanda[j] if j in CLIENT_SET else 0
         
         return m.cargo[v, j] >= m.cargo[v, i] + demanda_j - M * (1 - m.x[v, i, j])
     
@@ -287,8 +292,6 @@ def build_model_caso2(data2: dict, scale_fuel_cost: float = 0.001) -> pyo.Concre
         consumo = m.dist[i, j] / m.fuel_efficiency
         M = m.fuel_cap[v] + consumo
         
-        consumo = m.dist[i, j] / m.fuel_efficiency
-        
         return m.combustible[v, j] >= m.combustible[v, i] - consumo + m.recarga[v, j] - M * (1 - m.x[v, i, j])
     
     model.balance_combustible = pyo.Constraint(model.V, model.A, rule=balance_combustible_rule, 
@@ -324,9 +327,74 @@ def build_model_caso2(data2: dict, scale_fuel_cost: float = 0.001) -> pyo.Concre
     model.combustible_no_negativo = pyo.Constraint(model.V, model.N, rule=combustible_no_negativo_rule, 
                                                    doc="Combustible no negativo")
     
+    # =========================================================================
+    # PASO 10: RUPTURA DE SIMETRÍA ENTRE VEHÍCULOS IDÉNTICOS
+    # =========================================================================
+    
+    # Vehículos con la misma capacidad de carga y de tanque son intercambiables:
+    # cualquier solución se puede permutar entre ellos sin cambiar el costo.
+    # Se usan en el orden de VEHICLES (el primero de cada grupo antes que el siguiente).
+    pares_identicos = []
+    ultimo_por_tipo = {}
+    for v in VEHICLES:
+        tipo = (load_cap[v], fuel_cap[v])
+        if tipo in ultimo_por_tipo:
+            pares_identicos.append((ultimo_por_tipo[tipo], v))
+        ultimo_por_tipo[tipo] = v
+    
+    # R13: y[v] >= y[w] para vehículos idénticos consecutivos
+    def orden_vehiculos_rule(m, v, w):
+        """Un vehículo solo se usa si el anterior idéntico también se usa."""
+        return m.y[v] >= m.y[w]
+    
+    model.orden_vehiculos = pyo.Constraint(pares_identicos, rule=orden_vehiculos_rule, 
+                                           doc="Ruptura de simetría entre vehículos idénticos")
+    
     return model
 
 
+def ajustar_cotas_combustible(model: pyo.ConcreteModel, data2: dict) -> None:
+    """
+    Ajusta las cotas de `combustible` y `recarga` a partir de la geometría.
+    
+    El balance de combustible es una desigualdad Big-M, así que por sí solo deja
+    que el nivel en un cliente llegue hasta el tanque lleno. Físicamente, al llegar
+    a un nodo j se gastó al menos la distancia desde el último punto de recarga
+    (depósito o estación); con distancias Haversine la ruta más corta desde ese
+    punto es el tramo directo, así que:
+    
+        combustible[v, j] <= fuel_cap[v] - min_s dist[s, j] / fuel_efficiency
+        recarga[v, j]     <= fuel_cap[v]   (0 fuera de estaciones/depósito)
+    
+    Cotas más ajustadas dan una relajación LP más fuerte y menos nodos en B&B.
+    
+    Args:
+        model: Modelo construido con build_model_caso2()
+        data2: Datos con 'node_index' y 'dist_mat'
+    """
+    DEPOT = data2['DEPOT']
+    STATIONS = data2['STATIONS']
+    NODES = data2['NODES']
+    node_index = data2['node_index']
+    dist_mat = data2['dist_mat']
+    
+    # Distancia mínima desde cualquier punto de recarga a cada nodo (una sola reducción)
+    fuentes = np.array([node_index[n] for n in [DEPOT] + list(STATIONS)], dtype=np.intp)
+    destinos = np.array([node_index[n] for n in NODES], dtype=np.intp)
+    consumo_min = dist_mat[np.ix_(fuentes, destinos)].min(axis=0) / data2['fuel_efficiency']
+    
+    puntos_recarga = set(STATIONS) | {DEPOT}
+    for v in model.V:
+        cap = pyo.value(model.fuel_cap[v])
+        for n, consumo in zip(NODES, consumo_min.tolist()):
+            if n in puntos_recarga:
+                model.combustible[v, n].setub(cap)
+                model.recarga[v, n].setub(cap)
+            else:
+                model.combustible[v, n].setub(max(0.0, cap - consumo))
+                model.recarga[v, n].setub(0.0)
+
+
 def extraer_solucion_caso2(model: pyo.ConcreteModel, data2: dict) -> dict:
     """
     Extrae la solución del modelo optimizado del Caso 2.
@@ -359,6 +427,7 @@ def extraer_solucion_caso2(model: pyo.ConcreteModel, data2: dict) -> dict:
     NODES = data2['NODES']
     dist = data2['dist']
     demanda = data2['demanda']
+    CLIENT_SET = frozenset(CLIENTS)  # Pertenencia O(1) al recorrer las rutas
     
     # Extraer rutas de cada vehículo
     rutas = {}
@@ -368,23 +437,48 @@ def extraer_solucion_caso2(model: pyo.ConcreteModel, data2: dict) -> dict:
     combustible_detalles = {}
     recargas_detalles = {}
     
-    for v in VEHICLES:
-        if pyo.value(model.y[v]) > 0.5:  # Vehículo usado
+    # Matriz de distancias densa indexada por posición en NODES (build_subset ya
+    # la trae; para los datos completos se arma una vez aquí)
+    node_index = data2.get('node_index') or {n: k for k, n in enumerate(NODES)}
+    dist_mat = data2.get('dist_mat')
+    if dist_mat is None:
+        dist_mat = np.zeros((len(NODES), len(NODES)))
+        for (i, j), d in dist.items():
+            dist_mat[node_index[i], node_index[j]] = d
+    
+    # Lectura masiva de la solución: un solo barrido por variable indexada
+    # (None = variable sin valor, se trata como 0)
+    x_vals = model.x.extract_values()
+    y_vals = model.y.extract_values()
+    fuel_vals = model.combustible.extract_values()
+    refuel_vals = model.recarga.extract_values()
+    precio_vals = model.fuel_price.extract_values()
+    
+    # Sucesor de cada nodo por vehículo en una sola pasada sobre x: {v: {i: j}}
+    # (evita recorrer NODES y llamar pyo.value() en cada paso de la ruta)
+    sucesores = {}
+    for (v, i, j), val in x_vals.items():
+        if val is not None and val > 0.5:
+            sucesores.setdefault(v, {})[i] = j
+    
+    # Uso de vehículos como vector: una sola comparación para toda la flota
+    y_arr = np.fromiter(((y_vals.get(v) or 0.0) for v in VEHICLES), dtype=np.float64, count=len(VEHICLES))
+    
+    for v, usado in zip(VEHICLES, (y_arr > 0.5).tolist()):
+        if usado:
             vehiculos_usados.append(v)
             
             # Reconstruir la ruta del vehículo
             ruta = [DEPOT]
             nodo_actual = DEPOT
             visitados = set([DEPOT])
+            succ_v = sucesores.get(v, {})
             
             while True:
-                # Buscar el siguiente nodo
-                siguiente = None
-                for j in NODES:
-                    if j not in visitados and (nodo_actual, j) in model.A:
-                        if pyo.value(model.x[v, nodo_actual, j]) > 0.5:
-                            siguiente = j
-                            break
+                # Siguiente nodo en O(1); un nodo ya visitado cierra la ruta
+                siguiente = succ_v.get(nodo_actual)
+                if siguiente in visitados:
+                    siguiente = None
                 
                 if siguiente is None or siguiente == DEPOT:
                     ruta.append(DEPOT)
@@ -396,37 +490,32 @@ def extraer_solucion_caso2(model: pyo.ConcreteModel, data2: dict) -> dict:
             
             rutas[v] = ruta
             
-            # Calcular distancia total del vehículo
-            distancia_v = 0.0
-            for i in range(len(ruta) - 1):
-                distancia_v += dist[(ruta[i], ruta[i+1])]
+            # Calcular distancia total del vehículo (gather + suma sobre la matriz)
+            idx = np.fromiter((node_index[n] for n in ruta), dtype=np.intp, count=len(ruta))
+            tramos = dist_mat[idx[:-1], idx[1:]]
+            distancia_v = float(tramos.sum())
             distancias[v] = distancia_v
             
             # Calcular carga total (suma de demandas de clientes visitados)
-            carga_v = sum(demanda[c] for c in ruta if c in CLIENTS)
+            carga_v = sum(demanda[c] for c in ruta if c in CLIENT_SET)
             cargas[v] = carga_v
             
             # Extraer información de combustible
             combustible_info = {
-                'inicial': pyo.value(model.combustible[v, DEPOT]),
-                'minimo': min(pyo.value(model.combustible[v, i]) for i in ruta),
-                'final': pyo.value(model.combustible[v, DEPOT]) if len(ruta) > 1 else 0,
-                'consumo_total': 0.0
+                'inicial': fuel_vals.get((v, DEPOT)) or 0.0,
+                'minimo': min(fuel_vals.get((v, i)) or 0.0 for i in ruta),
+                'final': (fuel_vals.get((v, DEPOT)) or 0.0) if len(ruta) > 1 else 0,
+                'consumo_total': float((tramos / data2['fuel_efficiency']).sum())
             }
             
-            # Calcular consumo total
-            for i in range(len(ruta) - 1):
-                consumo = dist[(ruta[i], ruta[i+1])] / data2['fuel_efficiency']
-                combustible_info['consumo_total'] += consumo
-            
             combustible_detalles[v] = combustible_info
             
             # Extraer recargas
             recargas_v = []
             for i in ruta:
-                recarga_i = pyo.value(model.recarga[v, i])
+                recarga_i = refuel_vals.get((v, i)) or 0.0
                 if recarga_i > 0.01:  # Umbral para considerar recarga
-                    precio_i = data2['fuel_price'].get(i, pyo.value(model.fuel_price[i]))
+                    precio_i = data2['fuel_price'].get(i, precio_vals[i])
                     recargas_v.append({
                         'nodo': i,
                         'cantidad': recarga_i,
@@ -437,17 +526,17 @@ def extraer_solucion_caso2(model: pyo.ConcreteModel, data2: dict) -> dict:
             recargas_detalles[v] = recargas_v
     
     # Calcular costos
-    costo_fijo = sum(pyo.value(model.C_fixed * model.y[v]) for v in VEHICLES)
+    # (sobre los dicts ya extraídos, sin construir expresiones Pyomo por término)
+    costo_fijo = pyo.value(model.C_fixed) * float(y_arr.sum())
     
-    costo_distancia = sum(pyo.value(model.C_km * model.dist[i, j] * model.x[v, i, j]) 
-                         for v in VEHICLES 
-                         for (i, j) in model.A)
+    dist_vals = model.dist.extract_values()
+    costo_distancia = pyo.value(model.C_km) * sum(dist_vals[i, j] * val
+                                                  for (v, i, j), val in x_vals.items() if val)
     
     # IMPORTANTE: Reescalar costos de combustible al valor original
     fuel_scale = pyo.value(model.fuel_scale)
-    costo_combustible = sum(pyo.value(model.fuel_price[i] * model.recarga[v, i]) * fuel_scale
-                           for v in VEHICLES 
-                           for i in NODES)
+    costo_combustible = sum(precio_vals[i] * val
+                            for (v, i), val in refuel_vals.items() if val) * fuel_scale
     
     costo_total = pyo.value(model.objetivo)
     
@@ -456,7 +545,7 @@ def extraer_solucion_caso2(model: pyo.ConcreteModel, data2: dict) -> dict:
     # Contar clientes visitados
     clientes_visitados = set()
     for ruta in rutas.values():
-        clientes_visitados.update([n for n in ruta if n in CLIENTS])
+        clientes_visitados.update(CLIENT_SET.intersection(ruta))
     
     return {
         'rutas': rutas,
@@ -475,6 +564,30 @@ def extraer_solucion_caso2(model: pyo.ConcreteModel, data2: dict) -> dict:
     }
 
 
+# Variables que se guardan para el MIP start (x se guarda solo con los arcos activos)
+_WARM_START_VARS = ('y', 'cargo', 'combustible', 'recarga')
+
+
+def guardar_warm_start(model: pyo.ConcreteModel, clientes: List[str], path) -> None:
+    """Guarda la solución cargada en el modelo como MIP start (ver warm_start.py)."""
+    warm_start.guardar_warm_start(model, clientes, path, _WARM_START_VARS,
+                                  warm_start.huella_instancia(model))
+
+
+def cargar_warm_start(model: pyo.ConcreteModel, clientes: List[str], path) -> bool:
+    """
+    Asigna al modelo el MIP start guardado por guardar_warm_start() (ver warm_start.py).
+    
+    Todos los datos del modelo están en Params, así que la huella del modelo basta
+    para descartar starts de otros datos o de otra formulación.
+    
+    Returns:
+        True si se cargó el start; False si no existe o es de otra instancia
+    """
+    return warm_start.cargar_warm_start(model, clientes, path, _WARM_START_VARS,
+                                        warm_start.huella_instancia(model))
+
+
 def resolver_modelo_caso2(data2: dict, solver_name: str = 'highs', 
                           time_limit: int = 300, 
                           mip_gap: float = 0.01) -> Tuple[pyo.ConcreteModel, dict]:
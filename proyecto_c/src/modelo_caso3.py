@@ -1,5 +1,7 @@
 import pyomo.environ as pyo
 
+import warm_start
+
 def build_model_caso3(data):
 
     DEPOT      = data["DEPOT"]
@@ -42,6 +44,17 @@ def build_model_caso3(data):
     # Arcs (completos sin loops)
     model.A = pyo.Set(initialize=[(i, j) for i in NODES for j in NODES if i != j])
 
+    # ======================
+    # Parámetros
+    # ======================
+    # Precio del combustible por nodo (estación o, en otro nodo, el del depósito).
+    # Mutable: un análisis de precios puede cambiarlo y re-resolver el mismo modelo
+    # sin reconstruirlo.
+    model.fuel_price = pyo.Param(
+        model.N, mutable=True,
+        initialize=lambda m, n: fuel_price.get(n, fuel_price_depot),
+    )
+
     # ======================
     # Variables
     # ======================
@@ -82,13 +95,7 @@ def build_model_caso3(data):
         )
 
         # Costo de combustible comprado (simplificado)
-        cost_refuel = 0.0
-        for v in m.V:
-            for n in m.N:
-                price = fuel_price_depot
-                if n in fuel_price:
-                    price = fuel_price[n]
-                cost_refuel += price * m.r[v, n]
+        cost_refuel = sum(m.fuel_price[n] * m.r[v, n] for v in m.V for n in m.N)
 
         # Costo de peajes base (si se entra al cliente asociado)
         cost_tolls_base = 0.0
@@ -221,3 +228,34 @@ def build_model_caso3(data):
     model.toll_link_lower = pyo.Constraint(model.V, model.P, rule=toll_link_lower)
 
     return model
+
+
+# ======================
+# MIP start entre corridas
+# ======================
+# x se guarda solo con los arcos activos; el resto de variables, completas
+_WARM_START_VARS = ("u", "f", "r", "t_weight")
+
+# Datos que build_model_caso3 usa en las reglas sin pasarlos por un Param: entran
+# a la huella del start junto con los Params y la estructura del modelo
+_DATOS_HUELLA = ("demanda", "dist", "load_cap", "fuel_cap", "fuel_efficiency",
+                 "C_fixed", "C_km", "C_time", "max_weight",
+                 "toll_base_rate", "toll_rate_per_ton", "toll_client")
+
+
+def _huella(model, data):
+    return warm_start.huella_instancia(model, {k: data.get(k) for k in _DATOS_HUELLA})
+
+
+def guardar_warm_start(model, data, path):
+    # Ver warm_start.guardar_warm_start
+    warm_start.guardar_warm_start(model, data["CLIENTS"], path, _WARM_START_VARS,
+                                  _huella(model, data))
+
+
+def cargar_warm_start(model, data, path):
+    # True si se asignaron los valores; False si no hay archivo o es de otra instancia
+    # (otros clientes, otros datos u otra versión del modelo).
+    # Para usarlos, el solver debe correr con config.warmstart = True.
+    return warm_start.cargar_warm_start(model, data["CLIENTS"], path, _WARM_START_VARS,
+                                        _huella(model, data))
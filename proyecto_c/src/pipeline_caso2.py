@@ -0,0 +1,632 @@
+"""
+pipeline_caso2.py
+-----------------
+Pipeline compartido para generar los outputs del Caso 2 sobre un subconjunto de clientes.
+
+`extraer_solucion_caso2.py` y `generar_outputs_escenario_factible.py` hacen lo mismo
+(subset → modelo → HiGHS → rutas → CSV → PNG) y solo difieren en qué clientes usan
+y en los límites del solver. Este módulo concentra esos pasos para que ambos scripts
+sean envoltorios delgados. El CSV de verificación conserva el formato propio de
+cada script (ver FORMATOS_VERIFICACION).
+
+Autor: Proyecto C - Caso 2
+"""
+
+import csv
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import numpy as np
+import pyomo.environ as pyo
+from pyomo.contrib.appsi.base import TerminationCondition
+from pyomo.contrib.appsi.solvers import Highs
+
+from modelo_caso2 import guardar_warm_start, cargar_warm_start
+from heuristica_caso2 import construir_solucion_inicial, cargar_solucion_inicial
+
+
+# ===========================
+# SOLVER
+# ===========================
+
+# Fracción del límite de tiempo que puede usar la relajación LP antes del MIP
+FRACCION_TIEMPO_LP = 0.1
+
+
+def crear_solver(time_limit: float, mip_gap: float, verbose: bool = False,
+                 log_path=None) -> Highs:
+    """
+    Crea la interfaz persistente APPSI de HiGHS con las opciones del Caso 2.
+
+    Args:
+        time_limit: Límite de tiempo en segundos
+        mip_gap: Gap relativo aceptable (ej. 0.10 = 10%)
+        verbose: Si True, el log de HiGHS se muestra en consola
+        log_path: Archivo donde HiGHS escribe su log (None = sin archivo)
+
+    Returns:
+        Solver APPSI configurado (sin cargar la solución automáticamente)
+    """
+    solver = Highs()
+    solver.config.mip_gap = mip_gap
+    solver.config.time_limit = time_limit
+    solver.config.stream_solver = verbose
+    if log_path is not None:
+        solver.config.logfile = str(log_path)
+    solver.highs_options.update({
+        'presolve': 'on',
+        'parallel': 'on',
+        'threads': os.cpu_count() or 1,
+        'mip_abs_gap': 1e3,  # COP: diferencias menores no cambian la decisión
+        # Vehículos intercambiables: más esfuerzo heurístico y detección de simetría
+        'mip_heuristic_effort': 0.5,
+        'mip_detect_symmetry': True,
+        # El log va al archivo; a consola (y por el callback de Python) solo si verbose
+        'output_flag': verbose or log_path is not None,
+        'log_to_console': verbose,
+    })
+    solver.config.load_solution = False
+    return solver
+
+
+def contar_violaciones(model, tol: float = 1e-6) -> int:
+    """
+    Cuenta cuántas variables y restricciones activas viola la asignación cargada
+    en el modelo (por ejemplo, un MIP start leído de disco).
+
+    Una variable sin valor, fuera de sus cotas o fraccionaria siendo entera cuenta
+    como violación, igual que una restricción cuyo cuerpo no se puede evaluar o
+    se sale de [lb, ub] en más de `tol` (relativa a la magnitud de la cota).
+
+    Args:
+        model: Modelo de Pyomo con valores asignados
+        tol: Tolerancia de factibilidad
+
+    Returns:
+        Número de variables y restricciones violadas (0 = asignación factible)
+    """
+    def fuera(valor, lb, ub):
+        return ((lb is not None and valor < lb - tol * max(1.0, abs(lb))) or
+                (ub is not None and valor > ub + tol * max(1.0, abs(ub))))
+
+    violaciones = 0
+    for var in model.component_data_objects(pyo.Var, descend_into=True):
+        valor = var.value
+        if valor is None or fuera(valor, var.lb, var.ub):
+            violaciones += 1
+        elif var.is_integer() and abs(valor - round(valor)) > tol:
+            violaciones += 1
+
+    for restriccion in model.component_data_objects(pyo.Constraint, active=True,
+                                                    descend_into=True):
+        valor = pyo.value(restriccion.body, exception=False)
+        if valor is None or fuera(valor, restriccion.lb, restriccion.ub):
+            violaciones += 1
+
+    return violaciones
+
+
+def fijar_arcos_por_costo_reducido(model, cota_superior: float, time_limit: float) -> int:
+    """
+    Fija en 0 los arcos x[v,i,j] que no pueden aparecer en una solución mejor
+    que `cota_superior`, usando los costos reducidos de la relajación LP.
+
+    Si z_LP es el óptimo de la relajación y x[v,i,j] está en su cota inferior
+    con costo reducido d, toda solución entera con x[v,i,j] = 1 cuesta al menos
+    z_LP + d. Con d > cota_superior - z_LP el arco queda descartado y HiGHS
+    resuelve el MIP con muchas menos binarias.
+
+    Args:
+        model: Modelo construido con build_model_caso2()
+        cota_superior: Costo (en la escala del objetivo) de una solución factible;
+                       debe estar verificada (contar_violaciones), si no el
+                       descarte puede eliminar arcos de la solución óptima
+        time_limit: Límite de tiempo para la relajación LP en segundos
+
+    Returns:
+        Número de arcos fijados (0 si la relajación no llegó al óptimo)
+    """
+    # La relajación se resuelve sobre una copia para no tocar los dominios binarios
+    relajado = model.clone()
+    pyo.TransformationFactory('core.relax_integer_vars').apply_to(relajado)
+
+    lp = Highs()
+    lp.config.time_limit = time_limit
+    lp.config.load_solution = False
+    results = lp.solve(relajado)
+    if results.termination_condition != TerminationCondition.optimal:
+        return 0
+
+    arcos = list(relajado.x.values())
+    primales = results.solution_loader.get_primals(vars_to_load=arcos)
+    costos_reducidos = results.solution_loader.get_reduced_costs(vars_to_load=arcos)
+    holgura = cota_superior - results.best_feasible_objective
+
+    fijados = 0
+    for idx, var in relajado.x.items():
+        if primales[var] < 1e-6 and costos_reducidos[var] > holgura + 1e-6:
+            model.x[idx].fix(0)
+            fijados += 1
+    return fijados
+
+
+def resolver(model, clientes: List[str], time_limit: float, mip_gap: float,
+             warm_start_path=None, verbose: bool = False, data2: Dict[str, Any] = None,
+             log_path=None):
+    """
+    Resuelve el modelo con HiGHS usando (si existe) la solución previa como MIP start.
+
+    Sin solución previa y con `data2`, el MIP start es la heurística de
+    heuristica_caso2 (Clarke-Wright + 2-opt + inserción de estaciones).
+
+    Con un MIP start que satisface todas las restricciones del modelo actual, su
+    costo sirve de cota superior para fijar arcos por costo reducido
+    (fijar_arcos_por_costo_reducido) antes de resolver el MIP. Un start que viola
+    alguna restricción se entrega igual a HiGHS (que lo valida por su cuenta),
+    pero no se usa para fijar arcos.
+
+    `time_limit` cubre toda la llamada: la relajación LP usa a lo sumo una
+    fracción (FRACCION_TIEMPO_LP) y el MIP recibe el tiempo que queda.
+
+    Si hay solución factible, los valores se cargan en el modelo y se guardan como
+    warm start para la siguiente corrida del mismo escenario.
+
+    Args:
+        model: Modelo construido con build_model_caso2()
+        clientes: Clientes del escenario (clave del warm start)
+        time_limit: Límite de tiempo en segundos
+        mip_gap: Gap relativo aceptable
+        warm_start_path: Archivo JSON del warm start (None = no usar)
+        verbose: Si True, el log de HiGHS se muestra en consola
+        data2: Datos del subconjunto para la heurística (None = sin heurística)
+        log_path: Archivo para el log de HiGHS (None = sin archivo)
+
+    Returns:
+        Resultados APPSI (`termination_condition`, `best_feasible_objective`, ...)
+    """
+    inicio = time.perf_counter()
+    solver = crear_solver(time_limit, mip_gap, verbose, log_path)
+
+    # MIP start con la solución de una corrida previa del mismo escenario
+    if warm_start_path is not None and cargar_warm_start(model, clientes, warm_start_path):
+        solver.config.warmstart = True
+        print(f"  MIP start cargado: {warm_start_path.name}")
+    elif data2 is not None:
+        inicial = construir_solucion_inicial(data2)
+        if inicial is not None:
+            cargar_solucion_inicial(model, data2, inicial)
+            solver.config.warmstart = True
+            print(f"  MIP start heurístico (Clarke-Wright + 2-opt): {len(inicial)} vehículos")
+
+    # Costo del MIP start como cota superior, solo si el start es factible para
+    # este modelo: un start viejo (otros datos u otra formulación) puede violar
+    # restricciones y costar menos que el óptimo real
+    cota_superior = None
+    if solver.config.warmstart:
+        violaciones = contar_violaciones(model)
+        if violaciones:
+            print(f"  ⚠️  El MIP start viola {violaciones} restricciones/cotas: "
+                  f"no se fijan arcos por costo reducido")
+        else:
+            cota_superior = pyo.value(model.objetivo, exception=False)
+    if cota_superior is not None:
+        fijados = fijar_arcos_por_costo_reducido(model, cota_superior,
+                                                 FRACCION_TIEMPO_LP * time_limit)
+        print(f"  Arcos fijados en 0 por costo reducido: {fijados} de {len(model.x)}")
+
+    # El MIP recibe lo que queda del límite (heurística, verificación y LP incluidos)
+    solver.config.time_limit = max(time_limit - (time.perf_counter() - inicio), 1.0)
+    results = solver.solve(model)
+
+    if results.best_feasible_objective is not None:
+        results.solution_loader.load_vars()
+        if warm_start_path is not None:
+            guardar_warm_start(model, clientes, warm_start_path)
+
+    return results
+
+
+# ===========================
+# EXTRACCIÓN DE LA SOLUCIÓN
+# ===========================
+
+def precios_combustible(data2: Dict[str, Any]) -> defaultdict:
+    """
+    Precio del combustible por nodo: el de la estación, o el del depósito para
+    cualquier otro nodo. Se construye una vez por llamada en lugar de resolver
+    `.get(nodo, data2['fuel_price_depot'])` en cada recarga.
+    """
+    fuel_price_depot = data2['fuel_price_depot']
+    precio = defaultdict(lambda: fuel_price_depot)
+    precio.update(data2['fuel_price'])
+    return precio
+
+
+def extraer_solucion_completa(model, data2: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extrae rutas, distancias, combustible y recargas de un modelo ya resuelto.
+
+    Args:
+        model: Modelo resuelto (con valores cargados)
+        data2: Diccionario del subconjunto, retornado por build_subset()
+
+    Returns:
+        Diccionario con rutas por vehículo, clasificación de nodos, combustible,
+        recargas y el desglose de costos
+    """
+    vehiculos = data2['VEHICLES']
+    NODES = data2['NODES']
+    # Pertenencia O(1) para clasificar los nodos de cada ruta
+    CLIENT_SET = frozenset(data2['CLIENTS'])
+    STATION_SET = frozenset(data2['STATIONS'])
+    node_index = data2['node_index']
+    dist_mat = data2['dist_mat']
+    demanda = data2['demanda']
+    precio = precios_combustible(data2)
+    DEPOT_ID = node_index[data2['DEPOT']]
+
+    solucion = {
+        'rutas': {},
+        'vehiculos_usados': [],
+        'arcos_activos': [],  # (v, i, j) con x = 1
+        'distancias': {},
+        'cargas': {},
+        # Nivel de combustible al llegar a cada nodo de la ruta: fila = posición en
+        # VEHICLES, columna = node_index (0 en nodos fuera de la ruta)
+        'combustible': np.zeros((len(vehiculos), len(NODES)), dtype=np.float32),
+        'recargas': {},  # Recargas por estación
+        'clientes_ruta': {},  # Clientes de cada ruta, en orden de visita
+        'estaciones_ruta': {},  # Estaciones de cada ruta, en orden de visita
+        'costo_total': 0,
+        'costo_fijo': 0,
+        'costo_distancia': 0,
+        'costo_combustible': 0,
+        'distancia_total': 0,
+        'num_vehiculos': 0,
+        'clientes_visitados': 0
+    }
+
+    # Lectura masiva de la solución: un solo barrido por variable indexada
+    x_vals = model.x.extract_values()
+    y_vals = model.y.extract_values()
+    fuel_vals = model.combustible.extract_values()
+    refuel_vals = model.recarga.extract_values()
+
+    # Sucesor de cada nodo por vehículo con IDs enteros: {vid: {i_id: j_id}}
+    sucesores = {}
+    for (v, i, j), val in x_vals.items():
+        if val is not None and val > 0.5:
+            solucion['arcos_activos'].append((v, i, j))
+            sucesores.setdefault(v, {})[node_index[i]] = node_index[j]
+
+    # Vehículos usados con una sola comparación vectorial sobre y
+    y_arr = np.fromiter(((y_vals.get(v) or 0.0) for v in vehiculos), dtype=np.float64, count=len(vehiculos))
+    usados = [vehiculos[k] for k in np.flatnonzero(y_arr > 0.5)]
+
+    fuel_arr = solucion['combustible']
+    vehiculo_index = {v: k for k, v in enumerate(vehiculos)}
+
+    for vid in usados:
+        solucion['vehiculos_usados'].append(vid)
+        solucion['num_vehiculos'] += 1
+
+        # Reconstruir ruta sobre posiciones enteras; visitados como máscara de bits
+        ruta_ids = [DEPOT_ID]
+        visitados = 1 << DEPOT_ID
+        actual = DEPOT_ID
+        succ_v = sucesores.get(vid, {})
+
+        # Límite de seguridad: una ruta simple no puede tener más de |N| + 1 nodos
+        while len(ruta_ids) <= len(NODES):
+            siguiente = succ_v.get(actual)
+
+            if siguiente is None or siguiente == DEPOT_ID:
+                ruta_ids.append(DEPOT_ID)
+                break
+
+            if visitados & (1 << siguiente):
+                print(f"⚠️  Ciclo detectado en ruta de {vid}")
+                break
+
+            ruta_ids.append(siguiente)
+            visitados |= 1 << siguiente
+            actual = siguiente
+
+        ruta = [NODES[k] for k in ruta_ids]
+        solucion['rutas'][vid] = ruta
+
+        # Distancia de la ruta: gather + suma sobre la matriz densa
+        idx = np.array(ruta_ids, dtype=np.intp)
+        dist_ruta = float(dist_mat[idx[:-1], idx[1:]].sum())
+        solucion['distancias'][vid] = dist_ruta
+        solucion['distancia_total'] += dist_ruta
+
+        # Clasificar los nodos de la ruta en una sola pasada
+        clientes_en_ruta = []
+        estaciones_en_ruta = []
+        for nodo in ruta:
+            if nodo in CLIENT_SET:
+                clientes_en_ruta.append(nodo)
+            elif nodo in STATION_SET:
+                estaciones_en_ruta.append(nodo)
+        solucion['clientes_ruta'][vid] = clientes_en_ruta
+        solucion['estaciones_ruta'][vid] = estaciones_en_ruta
+
+        # Calcular carga total entregada
+        carga_total = sum(demanda[nodo] for nodo in clientes_en_ruta)
+        solucion['cargas'][vid] = carga_total
+        solucion['clientes_visitados'] += len(clientes_en_ruta)
+
+        # Extraer datos de combustible
+        recargas_nodos = {}
+
+        # Un solo acceso por (vid, nodo); None (variable sin valor) se trata como 0
+        fuel_arr[vehiculo_index[vid], idx] = [fuel_vals.get((vid, nodo), 0.0) or 0.0 for nodo in ruta]
+
+        for nodo in ruta:
+            refuel_amount = refuel_vals.get((vid, nodo), 0.0) or 0.0
+            if refuel_amount > 0.1:  # Threshold para evitar ruido numérico
+                recargas_nodos[nodo] = refuel_amount
+
+        solucion['recargas'][vid] = recargas_nodos
+
+    # Calcular costos
+    solucion['costo_fijo'] = solucion['num_vehiculos'] * data2['C_fixed']
+    solucion['costo_distancia'] = solucion['distancia_total'] * data2['C_km']
+
+    # Costo de combustible (sumando todas las recargas)
+    costo_fuel = 0
+    for vid in solucion['vehiculos_usados']:
+        for nodo, cantidad in solucion['recargas'][vid].items():
+            costo_fuel += cantidad * precio[nodo]
+
+    solucion['costo_combustible'] = costo_fuel
+    solucion['costo_total'] = solucion['costo_fijo'] + solucion['costo_distancia'] + solucion['costo_combustible']
+
+    return solucion
+
+
+# ===========================
+# OUTPUTS: CSV Y MAPA
+# ===========================
+
+# Formatos del CSV de verificación: 'oficial' es el de extraer_solucion_caso2.py y
+# 'escenario' el de generar_outputs_escenario_factible.py, que no suma costo de
+# tiempo (el objetivo del modelo tampoco lo tiene) y escribe la carga y el
+# combustible iniciales sin redondear
+FORMATOS_VERIFICACION = {
+    'oficial': {
+        'flecha': ' → ', 'sin_clientes': 'Ninguno', 'sin_estaciones': 'Ninguna',
+        'sep_recargas': ', ', 'costo_tiempo': True, 'redondear_iniciales': True,
+    },
+    'escenario': {
+        'flecha': ' -> ', 'sin_clientes': '', 'sin_estaciones': 'NINGUNA',
+        'sep_recargas': '; ', 'costo_tiempo': False, 'redondear_iniciales': False,
+    },
+}
+
+
+def exportar_verificacion(solucion: Dict[str, Any], data2: Dict[str, Any], output_path,
+                          formato: str = 'oficial') -> None:
+    """
+    Exporta el CSV de verificación (una fila por vehículo usado).
+
+    Args:
+        solucion: Diccionario retornado por extraer_solucion_completa()
+        data2: Diccionario del subconjunto
+        output_path: Ruta del CSV de salida
+        formato: Clave de FORMATOS_VERIFICACION ('oficial' o 'escenario')
+    """
+    fmt = FORMATOS_VERIFICACION[formato]
+    header = [
+        'VehicleId', 'DepotId', 'InitialLoad', 'InitialFuel',
+        'RouteSequence', 'ClientsServed', 'DemandsSatisfied',
+        'StationsVisited', 'RefuelAmounts', 'TotalDistance',
+        'TotalTime', 'FuelCost', 'TotalCost'
+    ]
+
+    # Precalcular todas las filas y escribirlas en un solo writerows()
+    demanda = data2['demanda']
+    precio = precios_combustible(data2)
+    rows = []
+    for vid in solucion['vehiculos_usados']:
+        clientes = solucion['clientes_ruta'][vid]
+        estaciones = solucion['estaciones_ruta'][vid]
+        distancia = solucion['distancias'][vid]
+
+        # Recargas y costo de combustible
+        recargas = []
+        costo_combustible = 0
+        for nodo, cantidad in solucion['recargas'][vid].items():
+            recargas.append('%s:%.1fgal' % (nodo, cantidad))
+            costo_combustible += cantidad * precio[nodo]
+
+        # Tiempo (asumiendo 60 km/h promedio)
+        tiempo_h = distancia / 60.0
+
+        # Costos
+        costo_total_veh = data2['C_fixed'] + distancia * data2['C_km'] + costo_combustible
+        if fmt['costo_tiempo']:
+            costo_total_veh += tiempo_h * data2['C_time']
+
+        if fmt['redondear_iniciales']:
+            carga_inicial, combustible_inicial = '0.0', '%.1f' % data2['fuel_cap'][vid]
+        else:
+            carga_inicial, combustible_inicial = 0, data2['fuel_cap'][vid]
+
+        rows.append((
+            vid,
+            data2['DEPOT'],
+            carga_inicial,
+            combustible_inicial,
+            fmt['flecha'].join(solucion['rutas'][vid]),
+            ', '.join(clientes) if clientes else fmt['sin_clientes'],
+            ', '.join(['%.1fkg' % demanda[c] for c in clientes]) if clientes else fmt['sin_clientes'],
+            ', '.join(estaciones) if estaciones else fmt['sin_estaciones'],
+            fmt['sep_recargas'].join(recargas) if recargas else fmt['sin_estaciones'],
+            '%.2f' % distancia,
+            '%.2f' % tiempo_h,
+            '%.2f' % costo_combustible,
+            '%.2f' % costo_total_veh
+        ))
+
+    with open(output_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+    print(f"✓ CSV generado: {output_path}")
+
+
+def visualizar_rutas(solucion: Dict[str, Any], data2: Dict[str, Any], output_path,
+                     titulo: str, dpi: int = 100) -> None:
+    """
+    Dibuja las rutas del escenario sobre coordenadas (lon, lat) y guarda un PNG.
+
+    Args:
+        solucion: Diccionario retornado por extraer_solucion_completa()
+        data2: Diccionario del subconjunto (usa 'coords', 'NODES', 'node_index', 'DEPOT', 'CLIENTS')
+        output_path: Ruta del PNG de salida
+        titulo: Título del gráfico
+        dpi: Resolución del PNG
+    """
+    # matplotlib se importa aquí: las corridas que solo resuelven no pagan su carga.
+    # Figure + FigureCanvasAgg no pasan por pyplot ni por un backend GUI.
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.lines import Line2D
+
+    # Una FontProperties por tipo de etiqueta, compartida por todos los textos del tipo
+    fuente_cliente = FontProperties(size=10, weight='bold')
+    fuente_estacion = FontProperties(size=8, style='italic')
+
+    fig = Figure(figsize=(14, 10), constrained_layout=True)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+
+    colores_vehiculos = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6']
+    DEPOT = data2['DEPOT']
+    node_index = data2['node_index']
+
+    # Coordenadas como arreglo (N, 2) de (lon, lat) indexado por node_index:
+    # cada ruta o categoría de nodos se obtiene con un gather en lugar de lookups al dict
+    coords = data2['coords']
+    lonlat = np.array([(coords[n][1], coords[n][0]) for n in data2['NODES']], dtype=np.float64)
+
+    # Rutas: un solo LineCollection + un scatter de vértices para todos los vehículos
+    segmentos = []
+    colores_seg = []
+    vert_colores = []
+    est_ids, est_bordes = [], []
+    leyenda = []
+    estaciones_visitadas = []
+    for idx, vid in enumerate(solucion['vehiculos_usados']):
+        ruta = solucion['rutas'][vid]
+        color = colores_vehiculos[idx % len(colores_vehiculos)]
+
+        # Coordenadas de la ruta como filas (lon, lat)
+        puntos = lonlat[[node_index[nodo] for nodo in ruta]]
+        segmentos.append(puntos)
+        colores_seg.append(color)
+        vert_colores.extend([color] * len(puntos))
+        leyenda.append(Line2D([], [], color=color, marker='o', linewidth=2.5,
+                              markersize=8, alpha=0.8, label=f"{vid}"))
+
+        # Marcar estaciones visitadas (borde del color del vehículo)
+        for est in solucion['estaciones_ruta'][vid]:
+            est_ids.append(node_index[est])
+            est_bordes.append(color)
+            if est not in estaciones_visitadas:
+                estaciones_visitadas.append(est)
+
+    if segmentos:
+        vertices = np.concatenate(segmentos)
+        ax.add_collection(LineCollection(segmentos, colors=colores_seg, linewidths=2.5,
+                                         alpha=0.8, zorder=2, rasterized=True))
+        ax.scatter(vertices[:, 0], vertices[:, 1], c=vert_colores, s=8**2, alpha=0.8, zorder=2)
+    if est_ids:
+        est_pts = lonlat[est_ids]
+        ax.scatter(est_pts[:, 0], est_pts[:, 1], s=18**2, facecolors='yellow',
+                   edgecolors=est_bordes, linewidths=3, zorder=3)
+
+    # Dibujar nodos
+    # Depósito
+    depot_lon, depot_lat = lonlat[node_index[DEPOT]]
+    ax.scatter([depot_lon], [depot_lat], marker='s', c='red', s=22**2,
+               label='Depósito', zorder=5, edgecolors='darkred', linewidths=2)
+    ax.text(depot_lon, depot_lat, DEPOT,
+           fontsize=11, ha='right', weight='bold', color='white', zorder=6)
+
+    # Clientes
+    clientes = data2['CLIENTS']
+    cli_pts = lonlat[[node_index[c] for c in clientes]].reshape(-1, 2)
+    ax.scatter(cli_pts[:, 0], cli_pts[:, 1],
+               marker='o', c='blue', s=14**2, label='Cliente',
+               zorder=4, edgecolors='darkblue', linewidths=2)
+    for c, (lon, lat) in zip(clientes, cli_pts.tolist()):
+        ax.text(lon, lat, c, fontproperties=fuente_cliente,
+               ha='left', color='white', zorder=6)
+
+    # Estaciones visitadas
+    if estaciones_visitadas:
+        vis_pts = lonlat[[node_index[e] for e in estaciones_visitadas]]
+        ax.scatter(vis_pts[:, 0], vis_pts[:, 1],
+                   marker='^', c='green', s=12**2, label='Estación',
+                   zorder=3, alpha=0.7, edgecolors='darkgreen', linewidths=1.5)
+        for e, (lon, lat) in zip(estaciones_visitadas, vis_pts.tolist()):
+            ax.text(lon, lat, e, fontproperties=fuente_estacion,
+                   ha='center', va='bottom')
+
+    ax.set_xlabel('Longitud', fontsize=13, weight='bold')
+    ax.set_ylabel('Latitud', fontsize=13, weight='bold')
+    ax.set_title(titulo, fontsize=15, weight='bold', pad=15)
+    ax.grid(True, alpha=0.3, linestyle='--')
+    handles, _ = ax.get_legend_handles_labels()
+    ax.legend(handles=leyenda + handles, loc='best', fontsize=11, framealpha=0.95)
+    ax.margins(0.15)
+    ax.autoscale_view()
+
+    # Sin metadatos 'Software' ni optimize de PIL: menos trabajo al codificar el PNG
+    # constrained_layout ya ajusta los márgenes: sin bbox_inches='tight' no hay segundo dibujado
+    canvas.print_figure(output_path, dpi=dpi,
+                        metadata={'Software': None}, pil_kwargs={'optimize': False})
+
+    print(f"✓ Visualización generada: {output_path}")
+
+
+# ===========================
+# TIEMPOS POR FASE
+# ===========================
+
+def reportar_tiempos(marcas: Dict[str, float], output_path=None) -> Dict[str, float]:
+    """
+    Convierte marcas de time.perf_counter() en la duración de cada fase.
+
+    Cada fase dura desde su marca hasta la siguiente (en orden de inserción); la
+    última marca debe ser 'fin'. Imprime el desglose en una línea y, si se da
+    `output_path`, lo guarda como JSON para comparar entre corridas.
+
+    Args:
+        marcas: {fase: perf_counter al iniciar la fase}, terminando en 'fin'
+        output_path: Archivo JSON de salida (opcional)
+
+    Returns:
+        {fase: segundos}
+    """
+    fases = list(marcas)
+    tiempos = {f: marcas[sig] - marcas[f] for f, sig in zip(fases, fases[1:])}
+    total = marcas[fases[-1]] - marcas[fases[0]]
+
+    print("Tiempos: " + ", ".join(f"{f} {t:.2f}s ({t / total:.0%})" for f, t in tiempos.items())
+          + f" | total {total:.2f}s")
+
+    if output_path is not None:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({**tiempos, 'total': total}, f, indent=2)
+
+    return tiempos
@@ -31,12 +31,14 @@ Autor: Asistente IA (GitHub Copilot)
 Fecha: Noviembre 2025
 """
 
+import os
 import sys
 from pathlib import Path
 import csv
-import json
 from typing import Dict, Any
 
+import numpy as np
+
 # Añadir directorio raíz al path para imports
 proyecto_root = Path(__file__).parent.parent
 sys.path.insert(0, str(proyecto_root))
@@ -45,10 +47,8 @@ sys.path.insert(0, str(proyecto_root))
 from src.datos_caso1 import cargar_datos_caso1
 from src.modelo_caso1 import build_model, extraer_solucion
 
-# Imports para optimización y visualización
+# Imports para optimización (matplotlib se importa dentro de visualizar_rutas)
 import pyomo.environ as pyo
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
 from datetime import datetime
 
 
@@ -69,6 +69,9 @@ SOLVER_NAME = "appsi_highs"  # HiGHS es moderno y eficiente
 SOLVER_TIME_LIMIT = 120  # Límite de tiempo en segundos (2 minutos - ajustable)
 SOLVER_GAP = 0.05  # Gap de optimalidad aceptable (5% - ajustable entre 0.05-0.10)
 
+# Resolución del PNG (150 para revisión, PNG_DPI=300 para la entrega final)
+PNG_DPI = int(os.environ.get('PNG_DPI', '150'))
+
 # Parámetros para cálculo de tiempos y combustible
 VELOCIDAD_PROMEDIO = 60.0  # km/h (velocidad promedio en carretera para tractomulas)
 
@@ -110,54 +113,53 @@ def exportar_verificacion_caso1(solucion: Dict[str, Any], data: Dict, path_csv:
     fuel_efficiency = data['fuel_efficiency']  # km/galón
     fuel_price = data['cost_fuel']  # COP/galón
     
-    # Abrir archivo CSV para escritura
+    # Columnas según formato requerido
+    fieldnames = [
+        'VehicleId',
+        'DepotId',
+        'InitialLoad',
+        'RouteSequence',
+        'ClientsServed',
+        'DemandsSatisfied',
+        'TotalDistance',
+        'TotalTime',
+        'FuelCost'
+    ]
+    
+    # Columnas numéricas calculadas de una vez para todas las rutas
+    rutas = solucion['rutas']
+    distancias = np.array([r['distancia_total'] for r in rutas], dtype=np.float64)
+    # Tiempo total (distancia / velocidad, convertido a minutos)
+    tiempos = distancias / VELOCIDAD_PROMEDIO * 60.0
+    # Costo de combustible: consumo (galones) = distancia / rendimiento
+    costos_combustible = distancias / fuel_efficiency * fuel_price
+    
+    # Precalcular una tupla por vehículo usado y escribirlas con un solo writerows()
+    filas = []
+    for ruta_info, tiempo_total, costo_combustible in zip(rutas, tiempos.tolist(),
+                                                          costos_combustible.tolist()):
+        # Formatear lista de demandas como string separado por guiones
+        demandas_str = "-".join(str(int(d)) for d in ruta_info['demandas_por_cliente'])
+        
+        filas.append((
+            ruta_info['vehiculo_id'],
+            depot,
+            int(ruta_info['demanda_total']),
+            ruta_info['ruta_secuencia'],
+            ruta_info['num_clientes'],
+            demandas_str,
+            round(ruta_info['distancia_total'], 2),
+            round(tiempo_total, 1),
+            round(costo_combustible, 0)
+        ))
+        
+        print(f"✓ {ruta_info['vehiculo_id']}: {ruta_info['num_clientes']} clientes, "
+              f"{ruta_info['distancia_total']:.1f} km, {tiempo_total:.1f} min")
+    
     with open(path_csv, 'w', newline='', encoding='utf-8') as csvfile:
-        # Definir columnas según formato requerido
-        fieldnames = [
-            'VehicleId',
-            'DepotId',
-            'InitialLoad',
-            'RouteSequence',
-            'ClientsServed',
-            'DemandsSatisfied',
-            'TotalDistance',
-            'TotalTime',
-            'FuelCost'
-        ]
-        
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        # Escribir una fila por cada vehículo usado
-        for ruta_info in solucion['rutas']:
-            # Calcular tiempo total (distancia / velocidad, convertido a minutos)
-            tiempo_total = (ruta_info['distancia_total'] / VELOCIDAD_PROMEDIO) * 60.0
-            
-            # Calcular consumo de combustible y costo
-            # Consumo (galones) = distancia / rendimiento
-            consumo_galones = ruta_info['distancia_total'] / fuel_efficiency
-            costo_combustible = consumo_galones * fuel_price
-            
-            # Formatear lista de demandas como string separado por guiones
-            demandas_str = "-".join(str(int(d)) for d in ruta_info['demandas_por_cliente'])
-            
-            # Crear fila del CSV
-            fila = {
-                'VehicleId': ruta_info['vehiculo_id'],
-                'DepotId': depot,
-                'InitialLoad': int(ruta_info['demanda_total']),
-                'RouteSequence': ruta_info['ruta_secuencia'],
-                'ClientsServed': ruta_info['num_clientes'],
-                'DemandsSatisfied': demandas_str,
-                'TotalDistance': round(ruta_info['distancia_total'], 2),
-                'TotalTime': round(tiempo_total, 1),
-                'FuelCost': round(costo_combustible, 0)
-            }
-            
-            writer.writerow(fila)
-            
-            print(f"✓ {ruta_info['vehiculo_id']}: {ruta_info['num_clientes']} clientes, "
-                  f"{ruta_info['distancia_total']:.1f} km, {tiempo_total:.1f} min")
+        writer = csv.writer(csvfile)
+        writer.writerow(fieldnames)
+        writer.writerows(filas)
     
     print(f"\n✓ Archivo guardado: {path_csv}")
     print(f"{'='*60}\n")
@@ -167,7 +169,7 @@ def exportar_verificacion_caso1(solucion: Dict[str, Any], data: Dict, path_csv:
 # FUNCIÓN: VISUALIZAR RUTAS
 # ===========================
 
-def visualizar_rutas(solucion: Dict[str, Any], data: Dict, path_png: Path) -> None:
+def visualizar_rutas(solucion: Dict[str, Any], data: Dict, path_png: Path, dpi: int = 150) -> None:
     """
     Genera una visualización gráfica de las rutas en un mapa de coordenadas.
     
@@ -175,7 +177,15 @@ def visualizar_rutas(solucion: Dict[str, Any], data: Dict, path_png: Path) -> No
         solucion: Diccionario con la solución del modelo
         data: Diccionario con los datos de entrada (coordenadas)
         path_png: Ruta donde se guardará la imagen PNG
+        dpi: Resolución del PNG (150 para revisión; 300 para la entrega final)
     """
+    # Import diferido: cargar matplotlib solo cuando se genera el gráfico.
+    # Figure + FigureCanvasAgg no pasan por pyplot ni por un backend GUI.
+    from matplotlib import colormaps
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
     
     print(f"\n{'='*60}")
     print("GENERANDO VISUALIZACIÓN DE RUTAS")
@@ -189,12 +199,23 @@ def visualizar_rutas(solucion: Dict[str, Any], data: Dict, path_png: Path) -> No
     depot = data['DEPOT']
     
     # Crear figura y ejes
-    fig, ax = plt.subplots(figsize=(14, 10))
+    fig = Figure(figsize=(14, 10), constrained_layout=True)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
     
     # Colores para las rutas (ciclo de colores distintos)
-    colores = plt.cm.tab10(range(10))  # Hasta 10 colores distintos
+    colores = colormaps['tab10'](range(10))  # Hasta 10 colores distintos
+    
+    # Acumular los tramos de todas las rutas para dibujarlos en una sola colección
+    segmentos = []
+    colores_segmentos = []
+    vertices_lon = []
+    vertices_lat = []
+    colores_vertices = []
+    leyenda_rutas = []
+    # Flechas direccionales: origen, desplazamiento y color (un solo quiver al final)
+    flechas_x, flechas_y, flechas_dx, flechas_dy, flechas_color = [], [], [], [], []
     
-    # Dibujar cada ruta
     for idx, ruta_info in enumerate(solucion['rutas']):
         ruta = ruta_info['ruta_indices']
         color = colores[idx % len(colores)]
@@ -203,22 +224,32 @@ def visualizar_rutas(solucion: Dict[str, Any], data: Dict, path_png: Path) -> No
         lats = [coords[nodo][0] for nodo in ruta]
         lons = [coords[nodo][1] for nodo in ruta]
         
-        # Dibujar línea de la ruta
-        ax.plot(lons, lats, 'o-', 
-                color=color, 
-                linewidth=2, 
-                markersize=6,
-                label=f"{ruta_info['vehiculo_id']} ({ruta_info['num_clientes']} clientes)",
-                alpha=0.7)
+        puntos = list(zip(lons, lats))
+        segmentos.extend(zip(puntos[:-1], puntos[1:]))
+        colores_segmentos.extend([color] * (len(puntos) - 1))
+        vertices_lon.extend(lons)
+        vertices_lat.extend(lats)
+        colores_vertices.extend([color] * len(puntos))
+        leyenda_rutas.append(Line2D([], [], marker='o', color=color, linewidth=2, markersize=6, alpha=0.7,
+                                    label=f"{ruta_info['vehiculo_id']} ({ruta_info['num_clientes']} clientes)"))
         
-        # Añadir flechas direccionales en algunos segmentos
+        # Flechas direccionales en algunos segmentos
         for i in range(0, len(ruta) - 1, max(1, len(ruta) // 3)):
-            dx = lons[i+1] - lons[i]
-            dy = lats[i+1] - lats[i]
-            ax.annotate('', 
-                       xy=(lons[i+1], lats[i+1]), 
-                       xytext=(lons[i], lats[i]),
-                       arrowprops=dict(arrowstyle='->', color=color, lw=1.5, alpha=0.6))
+            flechas_x.append(lons[i])
+            flechas_y.append(lats[i])
+            flechas_dx.append(lons[i+1] - lons[i])
+            flechas_dy.append(lats[i+1] - lats[i])
+            flechas_color.append(color)
+    
+    # Líneas de todas las rutas (un solo artista) y vértices (un solo scatter)
+    ax.add_collection(LineCollection(segmentos, colors=colores_segmentos, linewidths=2, alpha=0.7))
+    ax.scatter(vertices_lon, vertices_lat, c=colores_vertices, s=36, alpha=0.7)
+    
+    # Todas las flechas en un solo quiver (en vez de un annotate por tramo)
+    if flechas_x:
+        ax.quiver(flechas_x, flechas_y, flechas_dx, flechas_dy, color=flechas_color,
+                  angles='xy', scale_units='xy', scale=1, alpha=0.6,
+                  width=0.002, headwidth=5, headlength=6)
     
     # Dibujar depósito (marcador especial)
     depot_lat, depot_lon = coords[depot]
@@ -231,15 +262,15 @@ def visualizar_rutas(solucion: Dict[str, Any], data: Dict, path_png: Path) -> No
            label='Depósito (CD01)',
            zorder=10)
     
-    # Dibujar clientes
-    for cliente in data['CLIENTS']:
-        lat, lon = coords[cliente]
-        ax.plot(lon, lat, 
-               marker='o', 
-               markersize=5, 
-               color='lightgray',
-               markeredgecolor='black',
-               markeredgewidth=0.5,
+    # Dibujar clientes (un solo scatter para todos)
+    clientes = data['CLIENTS']
+    ax.scatter([coords[c][1] for c in clientes],
+               [coords[c][0] for c in clientes],
+               marker='o',
+               s=5**2,
+               c='lightgray',
+               edgecolors='black',
+               linewidths=0.5,
                zorder=5)
     
     # Configuración de ejes y etiquetas
@@ -253,17 +284,14 @@ def visualizar_rutas(solucion: Dict[str, Any], data: Dict, path_png: Path) -> No
     
     # Grid y leyenda
     ax.grid(True, alpha=0.3, linestyle='--')
-    ax.legend(loc='best', fontsize=9, framealpha=0.9)
-    
-    # Ajustar márgenes
-    plt.tight_layout()
+    handles, _ = ax.get_legend_handles_labels()
+    ax.legend(handles=leyenda_rutas + handles, loc='best', fontsize=9, framealpha=0.9)
     
-    # Guardar figura
-    plt.savefig(path_png, dpi=300, bbox_inches='tight')
+    # Guardar figura (la figura no queda registrada en pyplot: no hace falta cerrarla)
+    # constrained_layout ya ajusta los márgenes: sin bbox_inches='tight' no hay segundo dibujado
+    canvas.print_figure(path_png, dpi=dpi)
     print(f"✓ Gráfico guardado: {path_png}")
     print(f"{'='*60}\n")
-    
-    plt.close()
 
 
 # ===========================
@@ -283,40 +311,47 @@ def guardar_resumen(solucion: Dict[str, Any], data: Dict, path_txt: Path) -> Non
     # Crear directorio si no existe
     path_txt.parent.mkdir(parents=True, exist_ok=True)
     
+    # El resumen se arma en memoria y se escribe con una sola llamada
+    lineas = [
+        "=" * 70 + "\n",
+        "RESUMEN DE SOLUCIÓN - CASO 1 (PROYECTO C)\n",
+        "=" * 70 + "\n\n",
+        
+        f"Fecha de ejecución: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+        f"Solver utilizado: {SOLVER_NAME.upper()}\n\n",
+        
+        "-" * 70 + "\n",
+        "MÉTRICAS GLOBALES\n",
+        "-" * 70 + "\n",
+        f"Costo total: {solucion['costo_total']:,.2f} COP\n",
+        f"  - Costo fijo: {solucion['costo_fijo_total']:,.2f} COP\n",
+        f"  - Costo distancia: {solucion['costo_distancia_total']:,.2f} COP\n",
+        f"Vehículos usados: {solucion['num_vehiculos_usados']} de {data['num_vehicles']}\n",
+        f"Distancia total: {solucion['distancia_total_sistema']:.2f} km\n",
+        f"Clientes atendidos: {solucion['clientes_atendidos']} de {solucion['clientes_totales']}\n\n",
+        
+        "-" * 70 + "\n",
+        "DETALLE DE RUTAS\n",
+        "-" * 70 + "\n\n",
+    ]
+    
+    for ruta_info in solucion['rutas']:
+        lineas.extend((
+            f"Vehículo: {ruta_info['vehiculo_id']}\n",
+            f"  Ruta: {ruta_info['ruta_secuencia']}\n",
+            f"  Clientes atendidos: {ruta_info['num_clientes']}\n",
+            f"  Distancia: {ruta_info['distancia_total']:.2f} km\n",
+            f"  Demanda: {ruta_info['demanda_total']:.1f} kg\n",
+            f"  Utilización capacidad: {ruta_info['utilizacion_capacidad']:.1f}%\n",
+            f"  Utilización autonomía: {ruta_info['utilizacion_autonomia']:.1f}%\n",
+            f"  Costo: {ruta_info['costo_total_ruta']:,.2f} COP\n",
+            "\n",
+        ))
+    
+    lineas.append("=" * 70 + "\n")
+    
     with open(path_txt, 'w', encoding='utf-8') as f:
-        f.write("=" * 70 + "\n")
-        f.write("RESUMEN DE SOLUCIÓN - CASO 1 (PROYECTO C)\n")
-        f.write("=" * 70 + "\n\n")
-        
-        f.write(f"Fecha de ejecución: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"Solver utilizado: {SOLVER_NAME.upper()}\n\n")
-        
-        f.write("-" * 70 + "\n")
-        f.write("MÉTRICAS GLOBALES\n")
-        f.write("-" * 70 + "\n")
-        f.write(f"Costo total: {solucion['costo_total']:,.2f} COP\n")
-        f.write(f"  - Costo fijo: {solucion['costo_fijo_total']:,.2f} COP\n")
-        f.write(f"  - Costo distancia: {solucion['costo_distancia_total']:,.2f} COP\n")
-        f.write(f"Vehículos usados: {solucion['num_vehiculos_usados']} de {data['num_vehicles']}\n")
-        f.write(f"Distancia total: {solucion['distancia_total_sistema']:.2f} km\n")
-        f.write(f"Clientes atendidos: {solucion['clientes_atendidos']} de {solucion['clientes_totales']}\n\n")
-        
-        f.write("-" * 70 + "\n")
-        f.write("DETALLE DE RUTAS\n")
-        f.write("-" * 70 + "\n\n")
-        
-        for ruta_info in solucion['rutas']:
-            f.write(f"Vehículo: {ruta_info['vehiculo_id']}\n")
-            f.write(f"  Ruta: {ruta_info['ruta_secuencia']}\n")
-            f.write(f"  Clientes atendidos: {ruta_info['num_clientes']}\n")
-            f.write(f"  Distancia: {ruta_info['distancia_total']:.2f} km\n")
-            f.write(f"  Demanda: {ruta_info['demanda_total']:.1f} kg\n")
-            f.write(f"  Utilización capacidad: {ruta_info['utilizacion_capacidad']:.1f}%\n")
-            f.write(f"  Utilización autonomía: {ruta_info['utilizacion_autonomia']:.1f}%\n")
-            f.write(f"  Costo: {ruta_info['costo_total_ruta']:,.2f} COP\n")
-            f.write("\n")
-        
-        f.write("=" * 70 + "\n")
+        f.write(''.join(lineas))
     
     print(f"✓ Resumen guardado: {path_txt}\n")
 
@@ -478,7 +513,7 @@ def main():
         # PASO 8: GENERAR VISUALIZACIÓN
         # -----------------------------------------------------------------
         path_grafico = RUTA_RESULTS / "rutas_caso1.png"
-        visualizar_rutas(solucion, data, path_grafico)
+        visualizar_rutas(solucion, data, path_grafico, dpi=PNG_DPI)
         
         # -----------------------------------------------------------------
         # PASO 9: GUARDAR RESUMEN TEXTUAL
@@ -3,11 +3,16 @@
 # ============================================================
 
 import csv
+from collections import defaultdict
 from pathlib import Path
+
+import numpy as np
 import pyomo.environ as pyo
+from pyomo.contrib.appsi.base import TerminationCondition
+from pyomo.contrib.appsi.solvers import Highs
 
 from datos_caso3 import cargar_datos_caso3
-from modelo_caso3 import build_model_caso3
+from modelo_caso3 import build_model_caso3, guardar_warm_start, cargar_warm_start
 
 
 def main():
@@ -35,42 +40,52 @@ def main():
     # ----------------------------
     # 3. SOLVER CONFIG (OPTIMIZADO)
     # ----------------------------
-    solver = pyo.SolverFactory("appsi_highs")
+    # Interfaz persistente APPSI: el modelo pasa a HiGHS por su API en memoria
+    # (sin escribir LP/MPS); la misma instancia puede re-resolver tras cambiar
+    # parámetros mutables como model.fuel_price.
+    solver = Highs()
 
     # TIEMPO Y GAP (IMPORTANTE)
-    solver.options["time_limit"] = 60             # límite duro: 60 segundos
-    solver.options["mip_rel_gap"] = 0.20          # GAP permisivo (20%)
-
-    # PREVENT FREEZE / SPEED IMPROVEMENTS
-    solver.options["presolve"] = "on"
-    solver.options["parallel"] = "on"
-    solver.options["random_seed"] = 42
-    solver.options["heuristic_effort"] = "high"
-    solver.options["mip_heuristic_strategy"] = "aggressive"
-    solver.options["mip_detect_symmetry"] = "on"
+    solver.config.time_limit = 60                 # límite duro: 60 segundos
+    solver.config.mip_gap = 0.20                  # GAP permisivo (20%)
 
     # LOGGING
-    solver.options["output_flag"] = True
-    solver.options["log_to_console"] = True
+    solver.config.stream_solver = True
+    solver.config.load_solution = False
+
+    # PREVENT FREEZE / SPEED IMPROVEMENTS
+    solver.highs_options.update({
+        "presolve": "on",
+        "parallel": "on",
+        "random_seed": 42,
+        "mip_detect_symmetry": True,
+    })
+
+    # MIP start: la solución de la corrida anterior de la misma instancia
+    warm_start_path = OUT / "warm_start.json"
+    if cargar_warm_start(model, data, warm_start_path):
+        solver.config.warmstart = True
+        print(f"  MIP start cargado: {warm_start_path.name}")
 
     # solve
-    res = solver.solve(model, tee=True, load_solutions=False)
+    res = solver.solve(model)
 
-    if res.solver.termination_condition not in (
-        pyo.TerminationCondition.optimal,
-        pyo.TerminationCondition.feasible,
-        pyo.TerminationCondition.maxTimeLimit,
+    if res.best_feasible_objective is None or res.termination_condition not in (
+        TerminationCondition.optimal,
+        TerminationCondition.maxTimeLimit,
     ):
         print("❌ No se encontró solución.")
         return
 
-    model.solutions.load_from(res)
+    res.solution_loader.load_vars()
+    guardar_warm_start(model, data, warm_start_path)
 
     DEPOT = data["DEPOT"]
-    CLIENTS = data["CLIENTS"]
+    CLIENT_SET = frozenset(data["CLIENTS"])  # Pertenencia O(1) al filtrar rutas
     VEHICLES = data["VEHICLES"]
     NODES = data["NODES"]
-    dist = data["dist"]
+    dist_mat = data["dist_mat"]
+    node_index = data["node_index"]
     demanda = data["demanda"]
     toll_client = data["toll_client"]
     toll_base = data["toll_base_rate"]
@@ -81,22 +96,26 @@ def main():
     # ----------------------------
     rutas = {}
 
+    # Índice de arcos salientes por vehículo, en una sola lectura de x:
+    # {v: {i: [j, ...]}}
+    succ = defaultdict(lambda: defaultdict(list))
+    for (v, i, j), val in model.x.extract_values().items():
+        if val is not None and val > 0.5:
+            succ[v][i].append(j)
+
     for v in VEHICLES:
-        arcs_v = [(i, j) for (i, j) in model.A if pyo.value(model.x[v, i, j]) > 0.5]
-        if not arcs_v:
+        succ_v = succ.get(v)
+        if not succ_v:
             continue
 
         ruta = [DEPOT]
         actual = DEPOT
 
         for _ in range(300):
-            siguiente = None
-            for (i, j) in arcs_v:
-                if i == actual:
-                    siguiente = j
-                    break
-            if siguiente is None:
+            salientes = succ_v.get(actual)
+            if not salientes:
                 break
+            siguiente = salientes[0]
             ruta.append(siguiente)
             if siguiente == DEPOT:
                 break
@@ -109,70 +128,86 @@ def main():
     # ----------------------------
     out_csv = OUT / "verificacion_caso3.csv"
 
+    # COLUMNAS EXACTAS DEL ENUNCIADO
+    header = [
+        "VehicleID",
+        "RouteSequence",
+        "VisitedClients",
+        "TotalDemand",
+        "TotalDistance",
+        "TotalTimeHours",
+        "UsedCapacity",
+        "FuelPurchased",
+        "TollsPassed",
+        "BaseTollCost",
+        "WeightTollCost",
+        "TotalCost"
+    ]
+
+    # Peajes asociados a cada cliente, calculado una vez: el arco (i, j) paga los
+    # peajes de j sin recorrer TOLLS en cada tramo
+    peajes_por_cliente = defaultdict(list)
+    for p in data["TOLLS"]:
+        c_p = toll_client.get(p, "")
+        if c_p:
+            peajes_por_cliente[c_p].append(p)
+
+    # Valores que no cambian entre vehículos: se leen una sola vez
+    total_cost = pyo.value(model.obj)
+    u_vals = model.u.extract_values()
+    r_vals = model.r.extract_values()
+    t_weight_vals = model.t_weight.extract_values()
+
+    # Una tupla por vehículo; se escriben todas con un solo writerows()
+    filas = []
+    for v, ruta in rutas.items():
+
+        visited = [n for n in ruta if n in CLIENT_SET]
+
+        # Distancia: gather + suma sobre la matriz densa
+        idx = np.array([node_index[n] for n in ruta], dtype=np.intp)
+        dist_total = float(dist_mat[idx[:-1], idx[1:]].sum())
+        time_h = dist_total / 60.0  # suposición estándar del enunciado
+
+        # Demanda total atendida
+        demand_total = sum(demanda[c] for c in visited)
+
+        # Capacidad usada
+        used_cap = max(u_vals[v, n] for n in NODES)
+
+        # Fuel purchased
+        fuel_purch = sum(r_vals[v, n] for n in NODES)
+
+        # Peajes
+        tolls_pass = []
+        base_cost = 0.0
+        weight_cost = 0.0
+
+        for j in ruta[1:]:
+            for p in peajes_por_cliente.get(j, ()):
+                tolls_pass.append(p)
+                base_cost += toll_base[p]
+                weight_cost += toll_rate[p] * (t_weight_vals[v, p] / 1000.0)
+
+        filas.append((
+            v,
+            " → ".join(ruta),
+            ",".join(visited),
+            demand_total,
+            dist_total,
+            time_h,
+            used_cap,
+            fuel_purch,
+            ",".join(tolls_pass) if tolls_pass else "None",
+            base_cost,
+            weight_cost,
+            total_cost
+        ))
+
     with open(out_csv, "w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
-
-        # COLUMNAS EXACTAS DEL ENUNCIADO
-        w.writerow([
-            "VehicleID",
-            "RouteSequence",
-            "VisitedClients",
-            "TotalDemand",
-            "TotalDistance",
-            "TotalTimeHours",
-            "UsedCapacity",
-            "FuelPurchased",
-            "TollsPassed",
-            "BaseTollCost",
-            "WeightTollCost",
-            "TotalCost"
-        ])
-
-        for v, ruta in rutas.items():
-
-            visited = [n for n in ruta if n in CLIENTS]
-
-            # Distancia
-            dist_total = sum(dist[(ruta[k], ruta[k+1])] for k in range(len(ruta)-1))
-            time_h = dist_total / 60.0  # suposición estándar del enunciado
-
-            # Demanda total atendida
-            demand_total = sum(demanda[c] for c in visited)
-
-            # Capacidad usada
-            used_cap = max(pyo.value(model.u[v, n]) for n in NODES)
-
-            # Fuel purchased
-            fuel_purch = sum(pyo.value(model.r[v, n]) for n in NODES)
-
-            # Peajes
-            tolls_pass = []
-            base_cost = 0.0
-            weight_cost = 0.0
-
-            for (i, j) in zip(ruta[:-1], ruta[1:]):
-                for p in data["TOLLS"]:
-                    if toll_client.get(p, "") == j:
-                        tolls_pass.append(p)
-                        base_cost += toll_base[p]
-                        weight_cost += toll_rate[p] * (pyo.value(model.t_weight[v, p]) / 1000.0)
-
-            total_cost = pyo.value(model.obj)
-
-            w.writerow([
-                v,
-                " → ".join(ruta),
-                ",".join(visited),
-                demand_total,
-                dist_total,
-                time_h,
-                used_cap,
-                fuel_purch,
-                ",".join(tolls_pass) if tolls_pass else "None",
-                base_cost,
-                weight_cost,
-                total_cost
-            ])
+        w.writerow(header)
+        w.writerows(filas)
 
     print(f"\n✓ Archivo generado: {out_csv}\n")
     print("===============================================")
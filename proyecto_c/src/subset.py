@@ -0,0 +1,71 @@
+"""
+subset.py
+---------
+Construcción de subconjuntos del Caso 2 (escenarios con menos clientes).
+
+Los scripts de generación de outputs del Caso 2 resuelven el modelo sobre un
+SUBCONJUNTO de clientes (el problema completo no es tratable en tiempo razonable).
+Este módulo centraliza el filtrado de `data_full` (retornado por cargar_datos_caso2)
+para que ambos scripts construyan exactamente el mismo diccionario de datos.
+
+Autor: Proyecto C - Caso 2
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+def build_subset(data_full: Dict[str, Any], clientes: List[str]) -> Dict[str, Any]:
+    """
+    Filtra los datos completos del Caso 2 a un subconjunto de clientes.
+
+    Se mantienen el depósito, TODAS las estaciones y TODOS los vehículos.
+
+    Args:
+        data_full: Diccionario retornado por cargar_datos_caso2()
+        clientes: IDs de los clientes a incluir en el escenario
+
+    Returns:
+        Diccionario compatible con build_model_caso2(), con dos claves extra
+        para el postproceso:
+          - 'node_index': dict, {node_id: posición en NODES}
+          - 'dist_mat': np.ndarray (N, N), distancias en km indexadas por posición
+    """
+    DEPOT = data_full['DEPOT']
+    STATIONS = data_full['STATIONS']
+    NODES_SUBSET = [DEPOT] + list(clientes) + STATIONS
+
+    # Submatriz de distancias por slicing de la matriz densa completa
+    idx = np.array([data_full['node_index'][n] for n in NODES_SUBSET], dtype=np.intp)
+    dist_mat = data_full['dist_mat'][np.ix_(idx, idx)]
+    node_index = {n: k for k, n in enumerate(NODES_SUBSET)}
+
+    # Vista en dict solo porque los Param de build_model_caso2 se indexan por (i, j)
+    dist_sub = {
+        (i, j): d
+        for i, fila in zip(NODES_SUBSET, dist_mat.tolist())
+        for j, d in zip(NODES_SUBSET, fila)
+        if i != j
+    }
+
+    return {
+        'DEPOT': DEPOT,
+        'CLIENTS': list(clientes),
+        'STATIONS': STATIONS,
+        'NODES': NODES_SUBSET,
+        'VEHICLES': data_full['VEHICLES'],
+        'demanda': {c: data_full['demanda'][c] for c in clientes},
+        'load_cap': data_full['load_cap'],
+        'fuel_cap': data_full['fuel_cap'],
+        'fuel_efficiency': data_full['fuel_efficiency'],
+        'fuel_price': data_full['fuel_price'],
+        'fuel_price_depot': data_full['fuel_price_depot'],
+        'dist': dist_sub,
+        'node_index': node_index,
+        'dist_mat': dist_mat,
+        'C_fixed': data_full['C_fixed'],
+        'C_km': data_full['C_km'],
+        'C_time': data_full['C_time'],
+        'coords': data_full['coords']
+    }
@@ -0,0 +1,134 @@
+"""
+warm_start.py
+-------------
+MIP start entre corridas, compartido por los modelos del Caso 2 y del Caso 3.
+
+La solución de una corrida se guarda en JSON y se asigna a las variables del
+modelo en la siguiente; el solver debe correr luego con `config.warmstart = True`.
+El arreglo x (arcos) se guarda solo con los arcos activos y las demás variables
+(las que indique cada modelo) completas.
+
+Junto a la solución se guarda una huella de la instancia: un start de otros
+datos o de otra versión del modelo se descarta al cargar en vez de asignarse.
+
+Autor: Proyecto C
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pyomo.environ as pyo
+
+
+def huella_instancia(model: pyo.ConcreteModel, datos: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Hash de los datos y la estructura de un modelo.
+
+    Cubre los valores de todos los Param, los índices de todas las Var y el
+    número de restricciones activas. Los datos que el modelo usa directamente en
+    sus reglas (sin pasar por un Param) se agregan con `datos`.
+
+    Args:
+        model: Modelo de Pyomo ya construido
+        datos: Datos adicionales de la instancia (diccionarios, listas o escalares)
+
+    Returns:
+        Huella hexadecimal (blake2b, 16 bytes)
+    """
+    h = hashlib.blake2b(digest_size=16)
+
+    for param in sorted(model.component_objects(pyo.Param, descend_into=True),
+                        key=lambda c: c.name):
+        h.update(param.name.encode())
+        h.update(repr(list(param.extract_values().items())).encode())
+
+    for var in sorted(model.component_objects(pyo.Var, descend_into=True),
+                      key=lambda c: c.name):
+        h.update(var.name.encode())
+        h.update(repr(list(var.keys())).encode())
+
+    restricciones = sum(1 for _ in model.component_data_objects(
+        pyo.Constraint, active=True, descend_into=True))
+    h.update(str(restricciones).encode())
+
+    for clave, valor in sorted((datos or {}).items()):
+        h.update(clave.encode())
+        if isinstance(valor, dict):
+            # Orden estable aunque el diccionario se haya armado en otro orden
+            valor = sorted(valor.items(), key=repr)
+        h.update(repr(valor).encode())
+
+    return h.hexdigest()
+
+
+def guardar_warm_start(model: pyo.ConcreteModel, clientes: List[str], path,
+                       variables: Iterable[str], huella: str) -> None:
+    """
+    Guarda la solución cargada en el modelo como MIP start para otra corrida.
+
+    Args:
+        model: Modelo de Pyomo ya resuelto (valores cargados)
+        clientes: Clientes del escenario (el start solo es válido para el mismo conjunto)
+        path: Ruta del archivo JSON de salida
+        variables: Nombres de las variables a guardar además de x
+        huella: Huella de la instancia (huella_instancia)
+    """
+    estado = {
+        'clientes': sorted(clientes),
+        'huella': huella,
+        'x': [list(k) for k, val in model.x.extract_values().items()
+              if val is not None and val > 0.5],
+    }
+    for nombre in variables:
+        estado[nombre] = [
+            [list(k) if isinstance(k, tuple) else k, val]
+            for k, val in getattr(model, nombre).extract_values().items()
+            if val is not None
+        ]
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(estado, f)
+
+
+def cargar_warm_start(model: pyo.ConcreteModel, clientes: List[str], path,
+                      variables: Iterable[str], huella: str) -> bool:
+    """
+    Asigna a las variables del modelo los valores guardados por guardar_warm_start().
+
+    Args:
+        model: Modelo de Pyomo sin resolver
+        clientes: Clientes del escenario
+        path: Ruta del archivo JSON guardado
+        variables: Nombres de las variables guardadas además de x
+        huella: Huella de la instancia actual (huella_instancia)
+
+    Returns:
+        True si se cargó el start; False si no existe o es de otra instancia
+        (otros clientes, otros datos u otra versión del modelo)
+    """
+    path = Path(path)
+    if not path.exists():
+        return False
+
+    with open(path, 'r', encoding='utf-8') as f:
+        estado = json.load(f)
+
+    if estado.get('clientes') != sorted(clientes) or estado.get('huella') != huella:
+        return False
+
+    activos = {tuple(k) for k in estado['x']}
+    for idx, var in model.x.items():
+        var.set_value(1 if idx in activos else 0)
+
+    for nombre in variables:
+        componente = getattr(model, nombre)
+        for k, val in estado[nombre]:
+            idx = tuple(k) if isinstance(k, list) else k
+            if idx in componente:
+                componente[idx].set_value(val, skip_validation=True)
+
+    return True